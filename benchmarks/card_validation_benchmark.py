@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Per-card validation cost of CardValidator: valid data, data needing coercion,
+and data needing a repair pass.
+
+Usage:
+    python benchmarks/card_validation_benchmark.py [--repeat 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.card_selector import CardSelector  # noqa: E402
+
+# card_type -> (parameters needing coercion, parameters needing repair)
+CASES = {
+    "InfoCard": ({"query": "michael jordan"}, {"query": ["michael jordan"]}),
+    "FlightsCard": ({"departure_location": "SFO", "arrival_location": "JFK", "adults": "2"},
+                    {"departure_location": "SFO", "arrival_location": "JFK", "adults": "two"}),
+    "ShoppingCard": ({"search_query": "拉布布", "platforms": "Amazon"}, {"search_query": None}),
+    "YelpCard": ({"keyword": "sushi", "location": "San Francisco"}, {"keyword": {"name": "sushi"}}),
+    "Videos": ({"topic": "nba highlights"}, {"topic": None}),
+    "Images": ({"topic": "golden gate"}, {"topic": 42}),
+    "Translation": ({"input_text": "hello", "output_language": "Chinese"}, {"input_text": None}),
+    "Conversion": ({"input_value": "100"}, {"input_value": 100}),
+    "ChatCard": ({"query": "hi"}, {"query": None}),
+    "Comparison": ({"item_1": "iPhone 15", "item_2": "Pixel 9"}, {"item_1": ["iPhone 15"]}),
+    "PlanningCard": ({"query": "plan a trip"}, {}),
+}
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    selector = CardSelector()
+    validator = selector.card_validator
+    print(f"{'card':<22} {'full card us':>12} {'valid us':>9} {'repair us':>10}")
+    for card_type, (good, bad) in CASES.items():
+        name = selector._generate_card_data(card_type, good, "query", None).card_name
+        generate = lambda p: selector._generate_card_data(card_type, p, "query", None).data  # noqa: E731
+        good_data = generate(good)
+        raw_bad = dict(good_data, **bad)
+
+        generate_us = per_call_us(lambda: generate(good), args.repeat)
+        valid_us = per_call_us(lambda: validator.validate(name, good_data, lambda: good_data), args.repeat)
+        repair_us = per_call_us(lambda: validator.validate(name, raw_bad, lambda: good_data), args.repeat)
+        print(f"{name:<22} {generate_us:12.1f} {valid_us:9.1f} {repair_us:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared EntityExtractor against the previous per-character loops
+on the texts extracted from the example screens.
+
+Usage:
+    python benchmarks/entity_extraction_benchmark.py [--repeat 2000]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.entity_extractor import EntityExtractor, PERSON_INTENT, SHOPPING_INTENT  # noqa: E402
+from services.screen_content_processor import ScreenContentProcessor  # noqa: E402
+
+
+def legacy_extract(query, texts):
+    query_lower = query.lower()
+    if query_lower == "help me buy the product":
+        product_candidates = []
+        for text in texts:
+            text = text.strip()
+            if len(text) < 2 or len(text) > 10:
+                continue
+            if any('\u4e00' <= char <= '\u9fff' for char in text):
+                if '吗' in text and len(text.replace('你知道', '').replace('吗', '').strip()) > 1:
+                    product_candidates.append(text.replace('你知道', '').replace('吗', '').strip())
+                elif not any(word in text for word in ['你', '我', '他', '她', '吗', '呢', '的']):
+                    product_candidates.append(text)
+        if product_candidates:
+            return SHOPPING_INTENT, min(product_candidates, key=len)
+    elif query_lower == "please introduce him":
+        name_candidates = []
+        for text in texts:
+            text = text.strip()
+            if len(text) < 3 or len(text) > 50:
+                continue
+            text_lower = text.lower()
+            if any(keyword in text_lower for keyword in ['jordan', 'michael', '乔丹', '迈克尔']):
+                name_candidates.append("michael jordan")
+                break
+            if (any('\u4e00' <= char <= '\u9fff' for char in text) and 2 <= len(text) <= 4 and
+                    not any(word in text for word in ['百科', '词条', '编辑', '维护', '指南'])):
+                name_candidates.append(text)
+            if (text.replace(' ', '').isalpha() and len(text.split()) == 2 and
+                    all(word.istitle() for word in text.split())):
+                name_candidates.append(text)
+        if name_candidates:
+            best = "michael jordan" if "michael jordan" in name_candidates else name_candidates[0]
+            return PERSON_INTENT, best
+    return None
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    processor = ScreenContentProcessor()
+    extractor = EntityExtractor()
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*", "request.json"))):
+        with open(path, encoding="utf-8") as f:
+            request = json.load(f)
+        texts = [item.text for item in processor.extract_text_content(request["screen_content"])]
+        query = request["query"]
+
+        legacy, legacy_us = timed(lambda: legacy_extract(query, texts), args.repeat)
+        engine, engine_us = timed(lambda: extractor.extract(query, texts), args.repeat)
+        print(os.path.relpath(path, ROOT))
+        print(f"  legacy  {legacy_us:8.1f} us  -> {legacy}")
+        print(f"  engine  {engine_us:8.1f} us  -> {engine}")
+
+    # Paraphrases only the engine understands
+    for query in ["I want to purchase this", "帮我买这个", "who is he? tell me about him"]:
+        print(f"  {query!r}: legacy={legacy_extract(query, [])} intent={extractor.detect_intent(query)}")
+
+
+if __name__ == "__main__":
+    main()
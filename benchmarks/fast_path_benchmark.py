@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Latency of the local Conversion/Translation parsers versus the LLM path.
+
+The LLM path calls analyze_query, so set LLM_BACKEND=openai and OPENAI_API_KEY
+for real upstream numbers; with the mock backend the LLM column only measures the
+canned responses.
+
+Usage:
+    python benchmarks/fast_path_benchmark.py [--repeat 1000] [--llm-repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.card_selector import CardSelector  # noqa: E402
+
+QUERIES = [
+    "convert 100 usd to eur",
+    "100美元换成欧元",
+    "how many miles is 10 km",
+    "三百五十公斤等于多少磅",
+    "100 fahrenheit to celsius",
+    "translate good morning to French",
+    "把你好翻译成英文",
+    "谢谢用日语怎么说",
+]
+
+
+async def llm_latency(selector, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        analysis = await selector.openai_service.analyze_query(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--llm-repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    selector = CardSelector()
+    selector.warm_up()
+    print(f"{'local ms':>9} {'llm ms':>9}  query -> local parameters")
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            local = selector._local_analysis(query, 1)
+        local_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        llm_ms, _ = asyncio.run(llm_latency(selector, query, args.llm_repeat))
+        parameters = local["parameters"] if local else None
+        print(f"{local_ms:9.4f} {llm_ms:9.1f}  {query} -> {parameters}")
+
+
+if __name__ == "__main__":
+    main()
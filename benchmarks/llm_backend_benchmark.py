@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+The same load against each LLM backend: analyze_query latency percentiles,
+throughput and parse outcomes at a fixed concurrency.
+
+Requests are the example requests plus a few screen-free queries. Backends are
+configured from the environment as in the server (LLM_BASE_URL, LOCAL_LLM_BASE_URL,
+MOCK_LLM_RECORDINGS, MOCK_LLM_LATENCY_MS, pool sizes and timeouts).
+
+Usage:
+    python benchmarks/llm_backend_benchmark.py --backend mock --backend local [--requests 200] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config  # noqa: E402
+from services.llm_json import PARSE_OUTCOMES  # noqa: E402
+from services.openai_service import OpenAIService  # noqa: E402
+
+QUERIES = [
+    "book a flight from SFO to JFK next friday",
+    "best sushi near me",
+    "compare iPhone 15 and Pixel 9",
+    "plan a weekend trip to Tokyo",
+]
+
+
+def load_requests():
+    requests = [(query, None) for query in QUERIES]
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*", "request.json"))):
+        with open(path, encoding="utf-8") as f:
+            request = json.load(f)
+        requests.append((request["query"], request.get("screen_content")))
+    return requests
+
+
+async def run_load(service, requests, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, fallbacks = [], 0
+
+    async def run(i):
+        nonlocal fallbacks
+        query, screen_content = requests[i % len(requests)]
+        async with semaphore:
+            start = time.perf_counter()
+            analysis = await service.analyze_query(query, screen_content)
+            samples.append((time.perf_counter() - start) * 1000)
+        fallbacks += bool(analysis.get("fallback"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(total)))
+    return samples, fallbacks, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", action="append", choices=["openai", "local", "mock"],
+                        help="Backend to benchmark (repeatable, defaults to mock)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    requests = load_requests()
+    print(f"{'backend':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'fallback':>8}  parse outcomes")
+    for backend in args.backend or ["mock"]:
+        Config.LLM_BACKEND = backend
+        service = OpenAIService()
+        service.warm_up()
+        PARSE_OUTCOMES.clear()
+        samples, fallbacks, elapsed = asyncio.run(run_load(service, requests, args.requests, args.concurrency))
+        samples.sort()
+        p95, p99 = (samples[min(len(samples) - 1, int(len(samples) * q))] for q in (0.95, 0.99))
+        print(f"{backend:>8} {statistics.median(samples):8.1f} {p95:8.1f} {p99:8.1f} "
+              f"{len(samples) / elapsed:8.1f} {fallbacks:8d}  {dict(PARSE_OUTCOMES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Memory/allocation benchmark for screen text extraction on the example screens.
+
+Compares the compact ScreenTextItem traversal against the previous
+dict-per-node implementation (kept here as a baseline).
+
+Usage:
+    python benchmarks/screen_memory_benchmark.py [--repeat 50]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.screen_content_processor import ScreenContentProcessor  # noqa: E402
+
+ROUNDS = 20
+
+
+def legacy_traverse(node, texts, depth=0):
+    if not isinstance(node, dict):
+        return
+    if 'attributes' in node:
+        attrs = node['attributes']
+        text_content = attrs.get('text', '').strip()
+        if text_content and len(text_content) > 1:
+            texts.append({
+                'text': text_content,
+                'depth': depth,
+                'type': 'text',
+                'className': attrs.get('className', ''),
+                'resourceId': attrs.get('resourceId', ''),
+                'contentDescription': attrs.get('contentDescription', ''),
+                'clickable': attrs.get('clickable', False)
+            })
+        content_desc = attrs.get('contentDescription', '').strip()
+        if content_desc and len(content_desc) > 2 and content_desc != text_content:
+            texts.append({
+                'text': content_desc,
+                'depth': depth,
+                'type': 'description',
+                'className': attrs.get('className', ''),
+                'resourceId': attrs.get('resourceId', ''),
+                'contentDescription': content_desc,
+                'clickable': attrs.get('clickable', False)
+            })
+    if 'children' in node and isinstance(node['children'], list):
+        for child in node['children']:
+            legacy_traverse(child, texts, depth + 1)
+
+
+def legacy_filter(texts):
+    seen_texts = set()
+    filtered_texts = []
+    for item in texts:
+        text = item['text']
+        if text in seen_texts or len(text) < 2 or text.isspace() or text in ['', 'null', 'undefined']:
+            continue
+        seen_texts.add(text)
+        filtered_texts.append(item)
+
+    def priority_score(item):
+        score = item['depth'] * 2
+        if item['clickable']:
+            score += 10
+        if 'TextView' in item['className'] or 'Button' in item['className']:
+            score += 5
+        score += min(len(item['text']), 20)
+        return score
+
+    filtered_texts.sort(key=priority_score, reverse=True)
+    return filtered_texts[:20]
+
+
+def legacy_extract(hierarchy):
+    texts = []
+    legacy_traverse(hierarchy, texts)
+    return legacy_filter(texts), texts
+
+
+def compact_extract(processor, hierarchy):
+    texts = []
+    processor._traverse_hierarchy(hierarchy, texts, depth=0)
+    return processor._filter_meaningful_content(texts), texts
+
+
+def measure(fns, repeat):
+    """
+    Retained/peak memory of one call and best-of-ROUNDS time for each labelled function.
+    Rounds alternate between the functions, so a noisy neighbour slows them all alike.
+    """
+    results = {}
+    for label, fn in fns.items():
+        # Warm the per-process memos (class flags, chrome resourceIds) so only per-request memory is counted
+        fn()
+        tracemalloc.start()
+        result, raw = fn()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = (result, raw, current, peak)
+
+    times = {label: [] for label in fns}
+    for _ in range(ROUNDS):
+        for label, fn in fns.items():
+            times[label].append(timeit.timeit(fn, number=repeat) * 1000 / repeat)
+
+    for label, (result, raw, current, peak) in results.items():
+        print(f"  {label:<8} items={len(raw):<5} retained={current / 1024:8.1f} KiB "
+              f"peak={peak / 1024:8.1f} KiB  time={min(times[label]):6.2f} ms")
+    return [result for result, _, _, _ in results.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    processor = ScreenContentProcessor()
+    # Pruning drops the text of zero-size nodes, which the legacy traversal kept
+    unpruned = ScreenContentProcessor(prune_offscreen=False)
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*", "request.json"))):
+        with open(path, encoding="utf-8") as f:
+            request = json.load(f)
+        hierarchy = json.loads(request["screen_content"]).get("hierarchy", {})
+
+        print(os.path.relpath(path, ROOT))
+        legacy, compact = measure({
+            "legacy": lambda: legacy_extract(hierarchy),
+            "compact": lambda: compact_extract(processor, hierarchy),
+        }, args.repeat)
+
+        legacy_texts = [item['text'] for item in legacy]
+        same = legacy_texts == [item.text for item in compact]
+        print(f"  identical ranking: {same}")
+        if not same:
+            same_unpruned = legacy_texts == [item.text for item in compact_extract(unpruned, hierarchy)[0]]
+            print(f"  identical ranking without SCREEN_PRUNE_OFFSCREEN (zero-size text kept): {same_unpruned}")
+
+
+if __name__ == "__main__":
+    main()
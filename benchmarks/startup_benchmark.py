@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark: import time of `main` and time to first successful request.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--port 8765] [--top 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import_time(top: int):
+    """
+    Run `python -X importtime -c "import main"` and report the slowest imports
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_part, cumulative_part, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_part), int(self_part), name.rstrip()))
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit("Importing main failed")
+
+    total_us = max(row[0] for row in rows) if rows else 0
+    print(f"import main: {total_us / 1000:.1f} ms cumulative")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {name}")
+
+
+def _request(url: str, payload=None, timeout: float = 30.0):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.status, resp.read()
+
+
+def measure_first_request(port: int, timeout: float):
+    """
+    Start uvicorn and time readiness and the first successful /initial call
+    """
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        ready_at = None
+        while time.perf_counter() - start < timeout:
+            try:
+                status, _ = _request(f"{base}/ready", timeout=1.0)
+                if status == 200:
+                    ready_at = time.perf_counter()
+                    break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            time.sleep(0.02)
+        if ready_at is None:
+            raise SystemExit("Server did not become ready in time")
+
+        status, body = _request(f"{base}/initial", {"query": "book a flight from SFO to LAX"}, timeout=timeout)
+        first_at = time.perf_counter()
+        print(f"process start -> /ready:        {(ready_at - start) * 1000:.1f} ms")
+        print(f"process start -> first /initial: {(first_at - start) * 1000:.1f} ms (status {status})")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure import time")
+    args = parser.parse_args()
+
+    measure_import_time(args.top)
+    if not args.skip_server:
+        measure_first_request(args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
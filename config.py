@@ -3,8 +3,93 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Values of OPENAI_API_KEY that mean "not configured" (.env.example and the old test-mode marker)
+PLACEHOLDER_API_KEYS = ("", "OPENAI_API_KEY", "your_cerebras_api_key_here")
+
 class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
     HOST = os.getenv("HOST", "0.0.0.0")
-    PORT = int(os.getenv("PORT", 8000))
\ No newline at end of file
+    PORT = int(os.getenv("PORT", 8000))
+    
+    # Upstream model backend: openai (any OpenAI-compatible server, authenticated with OPENAI_API_KEY),
+    # local (llama.cpp-style server on this host) or mock (recorded/canned completions, no network calls).
+    # Defaults to openai when a real OPENAI_API_KEY is set, otherwise to mock.
+    LLM_BACKEND = os.getenv(
+        "LLM_BACKEND",
+        "mock" if (OPENAI_API_KEY or "") in PLACEHOLDER_API_KEYS else "openai"
+    ).lower()
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://cerebras-proxy.brain.loocaa.com:1443/v1")
+    LLM_MODEL = os.getenv("LLM_MODEL", "qwen-3-235b-a22b-instruct-2507")
+    LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", 0.3))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+    LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 5))
+    LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", 100))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+    LOCAL_LLM_BASE_URL = os.getenv("LOCAL_LLM_BASE_URL", "http://127.0.0.1:8080/v1")
+    LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "local")
+    LOCAL_LLM_TIMEOUT_SECONDS = float(os.getenv("LOCAL_LLM_TIMEOUT_SECONDS", 120))
+    LOCAL_LLM_POOL_SIZE = int(os.getenv("LOCAL_LLM_POOL_SIZE", 1))
+    # JSONL of recorded completions for the mock backend; misses get the canned test responses
+    MOCK_LLM_RECORDINGS = os.getenv("MOCK_LLM_RECORDINGS", "")
+    MOCK_LLM_LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", 0))
+    
+    # Upstream analyses admitted at once (0 = the backend's pool size). Requests queue per class
+    # (X-Brain-Request-Class: interactive or background) and free slots are shared by weight.
+    UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", 0))
+    INTERACTIVE_WEIGHT = float(os.getenv("INTERACTIVE_WEIGHT", 8))
+    INTERACTIVE_DEADLINE_MS = float(os.getenv("INTERACTIVE_DEADLINE_MS", 10000))
+    BACKGROUND_WEIGHT = float(os.getenv("BACKGROUND_WEIGHT", 1))
+    BACKGROUND_DEADLINE_MS = float(os.getenv("BACKGROUND_DEADLINE_MS", 120000))
+    
+    # "speculative" starts the LLM call while screen extraction runs; "sequential" extracts first
+    CARD_SELECTION_MODE = os.getenv("CARD_SELECTION_MODE", "speculative").lower()
+    
+    # Per-session context keyed by the X-Brain-Session-Id header: memory, sqlite or none
+    SESSION_STORE = os.getenv("SESSION_STORE", "memory").lower()
+    SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "sessions.sqlite3")
+    SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", 10000))
+    SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", 3))
+    SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", 1800))
+    
+    # Parse conversion and translation queries locally instead of asking the model
+    LOCAL_FAST_PATH = os.getenv("LOCAL_FAST_PATH", "True").lower() == "true"
+    
+    # Airport/city index used to resolve FlightsCard locations to IATA codes
+    AIRPORTS_DATA_PATH = os.getenv(
+        "AIRPORTS_DATA_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "airports.csv")
+    )
+    
+    # Precomputed answers for head queries (see tools/precompute_queries.py); empty disables
+    PRECOMPUTED_ANSWERS_PATH = os.getenv("PRECOMPUTED_ANSWERS_PATH", "")
+    PRECOMPUTED_RELOAD_INTERVAL = float(os.getenv("PRECOMPUTED_RELOAD_INTERVAL", 5))
+    
+    # Screen text ranking weights (see tools/fit_ranking_weights.py)
+    SCREEN_RANKING_CONFIG = os.getenv(
+        "SCREEN_RANKING_CONFIG",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "screen_ranking_weights.json")
+    )
+    
+    # Viewport pruning before screen text extraction
+    SCREEN_PRUNE_OFFSCREEN = os.getenv("SCREEN_PRUNE_OFFSCREEN", "True").lower() == "true"
+    # Comma-separated regexes matched against resourceId; matching subtrees (status/nav bars) are skipped
+    SCREEN_CHROME_RESOURCE_ID_PATTERNS = [
+        pattern.strip() for pattern in os.getenv(
+            "SCREEN_CHROME_RESOURCE_ID_PATTERNS",
+            r"^android:id/statusBarBackground$,^android:id/navigationBarBackground$,"
+            r":id/status_bar(_container)?$,:id/nav(igation)?_bar(_frame|_container)?$"
+        ).split(",") if pattern.strip()
+    ]
+    
+    # Sampled capture of /initial traffic (request, upstream replies, stage timings); empty dir disables
+    TRAFFIC_CAPTURE_DIR = os.getenv("TRAFFIC_CAPTURE_DIR", "")
+    TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", 0.01))
+    TRAFFIC_CAPTURE_REDACT = os.getenv("TRAFFIC_CAPTURE_REDACT", "True").lower() == "true"
+    TRAFFIC_CAPTURE_MAX_FILE_MB = float(os.getenv("TRAFFIC_CAPTURE_MAX_FILE_MB", 64))
+    TRAFFIC_CAPTURE_MAX_FILES = int(os.getenv("TRAFFIC_CAPTURE_MAX_FILES", 20))
+    
+    # Token for /admin endpoints (X-Admin-Token header); empty disables them
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 10))
@@ -1,20 +1,62 @@
-from fastapi import FastAPI, HTTPException, Header
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+import hmac
 import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Optional
 from dotenv import load_dotenv
 
+from config import Config
 from services.card_selector import CardSelector
+from services.llm_json import PARSE_OUTCOMES
+from services.profiler import ProfilerBusy, WorkerProfiler
+from services.request_scheduler import INTERACTIVE, DeadlineExceeded
+from services.traffic_capture import TrafficCaptureMiddleware, TrafficRecorder
 from models.request_models import InitialAPIRequest
 from models.response_models import InitialAPIResponse
 
 load_dotenv()
 
+_card_selector: Optional[CardSelector] = None
+
+traffic_recorder = TrafficRecorder(
+    Config.TRAFFIC_CAPTURE_DIR,
+    Config.TRAFFIC_CAPTURE_SAMPLE_RATE,
+    redact=Config.TRAFFIC_CAPTURE_REDACT,
+    max_file_bytes=int(Config.TRAFFIC_CAPTURE_MAX_FILE_MB * 1024 * 1024),
+    max_files=Config.TRAFFIC_CAPTURE_MAX_FILES
+) if Config.TRAFFIC_CAPTURE_DIR else None
+
+worker_profiler = WorkerProfiler(
+    max_seconds=Config.PROFILE_MAX_SECONDS,
+    interval=Config.PROFILE_SAMPLE_INTERVAL_MS / 1000
+)
+
+def get_card_selector() -> CardSelector:
+    """
+    Return the process-wide CardSelector, creating it on first use
+    """
+    global _card_selector
+    if _card_selector is None:
+        _card_selector = CardSelector()
+    return _card_selector
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up once per worker so the first request does not pay for client setup
+    app.state.ready = False
+    get_card_selector().warm_up()
+    app.state.ready = True
+    yield
+    if traffic_recorder is not None:
+        traffic_recorder.close()
+
 app = FastAPI(
     title="Initial API",
     description="API for returning the most suitable card based on user query",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -25,23 +67,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if traffic_recorder is not None:
+    app.add_middleware(TrafficCaptureMiddleware, recorder=traffic_recorder)
+
 @app.post("/initial", response_model=InitialAPIResponse)
 async def initial_api(
     request: InitialAPIRequest,
-    x_brain_user_location: Optional[str] = Header(None, alias="X-Brain-User-Location")
+    x_brain_user_location: Optional[str] = Header(None, alias="X-Brain-User-Location"),
+    x_brain_session_id: Optional[str] = Header(None, alias="X-Brain-Session-Id"),
+    x_brain_request_class: Optional[str] = Header(None, alias="X-Brain-Request-Class")
 ):
     """
     Process user query and return the most suitable card
     """
+    card_selector = get_card_selector()
+    request_class = (x_brain_request_class or INTERACTIVE).lower()
+    if request_class not in card_selector.scheduler.lanes:
+        raise HTTPException(status_code=400, detail=f"Unknown request class: {request_class}")
+    
     try:
-        card_selector = CardSelector()
         result = await card_selector.select_card(
             request.query, 
             request.screen_content, 
-            user_location=x_brain_user_location
+            user_location=x_brain_user_location,
+            max_cards=request.max_cards,
+            session_id=x_brain_session_id,
+            request_class=request_class
         )
         
-        # Check if any card is shopping, flight, or plan card
+        # Check if any of the returned cards is shopping, flight, or plan card
         hide_suggestion_cards = any(
             card.card_name in ["ShoppingSearchResults", "FlightsCard", "PlanningCard"] 
             for card in result
@@ -52,6 +106,9 @@ async def initial_api(
             card_list=result,
             hide_suggestion_cards=hide_suggestion_cards
         )
+    except DeadlineExceeded as e:
+        # Expired background work is dropped rather than served late; the caller may retry
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -63,6 +120,55 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: only reports ready once warm-up has finished
+    """
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready"}
+
+@app.get("/stats")
+async def stats():
+    """
+    Process-wide counters: upstream parse outcomes, per-lane scheduling and traffic capture
+    """
+    stats = {"llm_json": dict(PARSE_OUTCOMES), "scheduler": get_card_selector().scheduler.stats()}
+    if traffic_recorder is not None:
+        stats["traffic_capture"] = traffic_recorder.stats()
+    return stats
+
+@app.post("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    mode: Optional[str] = Query(None, pattern="^(sample|cprofile)$"),
+    allocations: bool = True,
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token")
+):
+    """
+    Profile the worker serving this request for a few seconds (capped by PROFILE_MAX_SECONDS).
+    Returns collapsed stacks tagged by request stage and the top allocation sites;
+    format=collapsed returns only the stacks as a file for flamegraph tools.
+    """
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), Config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
+    try:
+        result = await worker_profiler.profile(seconds, mode=mode, allocations=allocations)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if format == "collapsed":
+        return PlainTextResponse(
+            result["collapsed"],
+            headers={"Content-Disposition": f'attachment; filename="profile-{os.getpid()}.collapsed"'}
+        )
+    return result
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class InitialAPIRequest(BaseModel):
     query: str
-    screen_content: Optional[str] = None
\ No newline at end of file
+    screen_content: Optional[str] = None
+    # Number of ranked alternative cards to return, produced by a single LLM call
+    max_cards: int = Field(1, ge=1, le=5)
\ No newline at end of file
@@ -0,0 +1,203 @@
+import csv
+import difflib
+import json
+import math
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+
+_WHITESPACE = re.compile(r"\s+")
+# "旧金山国际机场", "SFO airport", "Heathrow Intl" -> the place name
+_AIRPORT_SUFFIX = re.compile(r"\s*(?:international\s+airport|intl\.?\s+airport|airport|intl\.?|国际机场|机场)$")
+_LAT_LONG = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*[,;\s]\s*(-?\d+(?:\.\d+)?)\s*$")
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def normalize_place(text: str) -> str:
+    return _AIRPORT_SUFFIX.sub("", _WHITESPACE.sub(" ", text.strip().lower()))
+
+
+def parse_user_location(location: str) -> Tuple[Optional[Tuple[float, float]], Optional[str]]:
+    """
+    Split an X-Brain-User-Location value into ((lat, long), None) or (None, place name).
+    Accepts "37.77,-122.41", {"latitude": .., "longitude": ..} JSON, or a free-text place.
+    """
+    match = _LAT_LONG.match(location)
+    if match:
+        lat, lon = float(match.group(1)), float(match.group(2))
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return (lat, lon), None
+    if location.lstrip().startswith("{"):
+        try:
+            data = json.loads(location)
+            lat = data.get("latitude", data.get("lat"))
+            lon = data.get("longitude", data.get("long", data.get("lng")))
+            if lat is not None and lon is not None:
+                return (float(lat), float(lon)), None
+            location = data.get("city") or data.get("name") or ""
+        except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+            pass
+    return None, location.strip() or None
+
+
+class AirportIndex:
+    """
+    In-memory airport and city index: IATA/metro codes, multilingual aliases, prefix and fuzzy lookup,
+    and nearest-airport search. Coordinates are kept in flat float arrays.
+    """
+    
+    def __init__(self, rows: List[Dict[str, str]]):
+        self.codes: List[str] = []
+        self.cities: List[str] = []
+        self.names: List[str] = []
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+        self._index_by_code: Dict[str, int] = {}
+        self._metros: Dict[str, List[str]] = {}
+        aliases: Dict[str, List[str]] = {}
+        
+        for row in rows:
+            code = row["iata"].upper()
+            self._index_by_code[code] = len(self.codes)
+            self.codes.append(code)
+            self.cities.append(row["city"])
+            self.names.append(row["name"])
+            self._latitudes.append(math.radians(float(row["lat"])))
+            self._longitudes.append(math.radians(float(row["lon"])))
+            if row["metro"]:
+                self._metros.setdefault(row["metro"].upper(), []).append(code)
+        
+        for row in rows:
+            code, metro = row["iata"].upper(), row["metro"].upper()
+            # City names resolve to every airport of the metro area; airport names only to that airport
+            city_codes = self._metros[metro] if metro else [code]
+            city_aliases = [a for a in row["city_aliases"].split("|") if a]
+            if not metro:
+                city_aliases.append(row["city"])
+            for alias in city_aliases:
+                self._add_alias(aliases, alias, city_codes)
+            for alias in [a for a in row["airport_aliases"].split("|") if a] + [row["name"]]:
+                self._add_alias(aliases, alias, [code])
+        
+        self._aliases: Dict[str, Tuple[str, ...]] = {alias: tuple(codes) for alias, codes in aliases.items()}
+        self._sorted_aliases: List[str] = sorted(self._aliases)
+        self._cjk_aliases: List[str] = [alias for alias in self._sorted_aliases if not alias.isascii() and len(alias) >= 2]
+    
+    @staticmethod
+    def _add_alias(aliases: Dict[str, List[str]], alias: str, codes: List[str]):
+        key = normalize_place(alias)
+        if not key:
+            return
+        existing = aliases.setdefault(key, [])
+        for code in codes:
+            if code not in existing:
+                existing.append(code)
+    
+    @classmethod
+    def from_csv(cls, path: str) -> "AirportIndex":
+        with open(path, encoding="utf-8", newline="") as f:
+            return cls(list(csv.DictReader(f)))
+    
+    def resolve(self, place: str) -> List[str]:
+        """
+        IATA codes for a place, best first: "SFO" -> [SFO], "NYC" -> [JFK, LGA, EWR], "旧金山" -> [SFO]
+        """
+        if not place or not place.strip():
+            return []
+        
+        code = place.strip().upper()
+        if code in self._index_by_code:
+            return [code]
+        if code in self._metros:
+            return list(self._metros[code])
+        
+        key = normalize_place(place)
+        if key.upper() in self._index_by_code:
+            return [key.upper()]
+        for candidate in (key, key.split(",")[0].strip()):
+            if candidate in self._aliases:
+                return list(self._aliases[candidate])
+        key = key.split(",")[0].strip()
+        
+        # CJK names run words together ("上海浦东"): prefer the most specific alias they contain
+        if not key.isascii():
+            contained = [alias for alias in self._cjk_aliases if alias in key]
+            if contained:
+                best = min(contained, key=lambda alias: (len(self._aliases[alias]), -len(alias)))
+                return list(self._aliases[best])
+        
+        # Prefix match: "san fr" -> "san francisco", only when every alias it starts names the same place
+        if len(key) >= 3:
+            matches = self._prefix_matches(key)
+            if matches:
+                # The metro alias covers the airport names within it: "lon" -> london, not london city
+                best = max(matches, key=len)
+                if all(set(codes) <= set(best) for codes in matches):
+                    return list(best)
+                # Ambiguous, e.g. "new" -> new chitose, new delhi, new york: guessing would book the wrong city
+                return []
+        
+        # Fuzzy match for typos: "san fransisco" -> "san francisco"
+        if len(key) >= 4:
+            close = difflib.get_close_matches(key, self._sorted_aliases, n=1, cutoff=0.8)
+            if close:
+                return list(self._aliases[close[0]])
+        
+        return []
+    
+    def _prefix_matches(self, prefix: str) -> List[Tuple[str, ...]]:
+        """
+        Codes of every alias starting with prefix, in alias order
+        """
+        matches = []
+        position = bisect_left(self._sorted_aliases, prefix)
+        while position < len(self._sorted_aliases) and self._sorted_aliases[position].startswith(prefix):
+            matches.append(self._aliases[self._sorted_aliases[position]])
+            position += 1
+        return matches
+    
+    def nearest(self, latitude: float, longitude: float) -> Optional[str]:
+        """
+        IATA code of the closest airport by great-circle distance
+        """
+        if not self.codes:
+            return None
+        lat, lon = math.radians(latitude), math.radians(longitude)
+        cos_lat = math.cos(lat)
+        best_index, best_value = 0, float("inf")
+        for i in range(len(self.codes)):
+            # Haversine without the final asin/sqrt, which preserve the ordering
+            value = (math.sin((self._latitudes[i] - lat) / 2) ** 2 +
+                     cos_lat * math.cos(self._latitudes[i]) * math.sin((self._longitudes[i] - lon) / 2) ** 2)
+            if value < best_value:
+                best_index, best_value = i, value
+        return self.codes[best_index]
+    
+    def describe(self, code: str) -> str:
+        """
+        "Midway International (MDW)"
+        """
+        index = self._index_by_code.get(code)
+        if index is None:
+            return code
+        return f"{self.names[index]} ({code})"
+
+
+_airport_index: Optional[AirportIndex] = None
+
+def get_airport_index() -> AirportIndex:
+    """
+    Return the bundled airport index, loading it once per process
+    """
+    global _airport_index
+    if _airport_index is None:
+        try:
+            _airport_index = AirportIndex.from_csv(Config.AIRPORTS_DATA_PATH)
+        except OSError as e:
+            print(f"Airport data unavailable ({e}), locations will be passed through unresolved")
+            _airport_index = AirportIndex([])
+    return _airport_index
@@ -1,20 +1,184 @@
+import asyncio
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
+from config import Config
+from services.airport_index import get_airport_index, parse_user_location
+from services.card_validator import get_card_validator
+from services.entity_extractor import EntityExtractor, PERSON_INTENT, SHOPPING_INTENT
 from services.openai_service import OpenAIService
+from services.precomputed_answers import PrecomputedAnswers, is_precomputable, is_screen_independent
+from services.request_scheduler import BACKGROUND, INTERACTIVE, DeadlineExceeded, Lane, RequestScheduler
+from services.request_stages import stage
 from services.screen_content_processor import ScreenContentProcessor
+from services.session_store import create_session_store, format_session_context
+from services.translation_parser import TranslationParser
+from services.unit_conversion import ConversionParser
 from models.response_models import CardData
-from models.card_models import *
+
+# Card that resolves the entity of each screen-reference intent
+INTENT_CARD_NAMES = {
+    SHOPPING_INTENT: "ShoppingSearchResults",
+    PERSON_INTENT: "InfoCard",
+}
+
+# Data field that names the resolved entity for each card, remembered per session
+SESSION_ENTITY_FIELDS = {
+    "InfoCard": "query",
+    "ShoppingSearchResults": "search_query",
+    "YelpCard": "keyword",
+    "Videos": "topic",
+    "Images": "topic",
+    "Comparison": "item_1",
+    "FlightsCard": "arrival_location",
+    "ChatCard": "query",
+    "PlanningCard": "query",
+}
+
+def _cancel_quietly(task: asyncio.Task):
+    """
+    Cancel a task whose result is no longer wanted, retrieving its exception if it already failed
+    so asyncio does not log "Task exception was never retrieved"
+    """
+    task.cancel()
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
 
 class CardSelector:
     def __init__(self):
         self.openai_service = OpenAIService()
         self.screen_processor = ScreenContentProcessor()
+        self.entity_extractor = EntityExtractor()
+        self.session_store = create_session_store()
+        self.precomputed = (
+            PrecomputedAnswers(Config.PRECOMPUTED_ANSWERS_PATH, Config.PRECOMPUTED_RELOAD_INTERVAL)
+            if Config.PRECOMPUTED_ANSWERS_PATH else None
+        )
+        self.speculative = Config.CARD_SELECTION_MODE == "speculative"
+        self.local_fast_path = Config.LOCAL_FAST_PATH
+        self.conversion_parser = ConversionParser()
+        self.translation_parser = TranslationParser()
+        self.airport_index = get_airport_index()
+        self.card_validator = get_card_validator()
+        self.scheduler = RequestScheduler(
+            Config.UPSTREAM_CONCURRENCY or self.openai_service.backend.pool_size,
+            [
+                Lane(INTERACTIVE, Config.INTERACTIVE_WEIGHT, Config.INTERACTIVE_DEADLINE_MS / 1000, drop_expired=False),
+                Lane(BACKGROUND, Config.BACKGROUND_WEIGHT, Config.BACKGROUND_DEADLINE_MS / 1000, drop_expired=True),
+            ]
+        )
     
-    async def select_card(self, query: str, screen_content: Optional[str] = None, user_location: Optional[str] = None) -> List[CardData]:
+    def warm_up(self):
+        """
+        Prepare the upstream client and screen parser so the first request does not pay for it
         """
-        Select the most suitable card based on user query, screen content, and user location
+        self.openai_service.warm_up()
+        self.screen_processor.extract_text_content('{"hierarchy": {}}')
+        if self.precomputed is not None:
+            self.precomputed.load()
+    
+    async def select_card(self, query: str, screen_content: Optional[str] = None, user_location: Optional[str] = None,
+                          max_cards: int = 1, session_id: Optional[str] = None,
+                          request_class: str = INTERACTIVE) -> List[CardData]:
+        """
+        Select the most suitable cards based on user query, screen content, and user location.
+        Up to max_cards ranked alternatives are returned from a single analysis call.
+        With a session_id, a follow-up about an entity resolved earlier in the session sends the model a short
+        context line instead of the screen summary.
+        request_class picks the scheduler lane and deadline for the model call.
+        """
+        deadline = self.scheduler.deadline(request_class)
+        session_context = None
+        if session_id and self.session_store is not None:
+            session_context = self._follow_up_context(query, await self.session_store.get(session_id))
+        
+        with stage("local_analysis"):
+            analysis = self._precomputed_analysis(query, max_cards) or self._local_analysis(query, max_cards)
+        if analysis is not None:
+            # Answered offline or by a local parser; no screen extraction or LLM call needed
+            extracted_info = {}
+        elif screen_content and self.speculative:
+            analysis, extracted_info = await self._analyze_speculative(
+                query, screen_content, max_cards, session_context, request_class, deadline
+            )
+        else:
+            analysis, extracted_info = await self._analyze_sequential(
+                query, screen_content, max_cards, session_context, request_class, deadline
+            )
+        
+        cards = []
+        with stage("card_generation"):
+            for candidate in self._ranked_candidates(analysis, max_cards):
+                card_type = candidate.get("card_type", "InfoCard")
+                parameters = dict(candidate.get("parameters") or {})
+                
+                # Override parameters with extracted information, only on the card they were extracted for
+                if extracted_info.get("override_parameters") and card_type == extracted_info.get("card_type"):
+                    parameters.update(extracted_info["override_parameters"])
+                
+                # Generate card based on type
+                cards.append(self._generate_card_data(
+                    card_type, parameters, query, screen_content, user_location
+                ))
+        
+        if session_id and self.session_store is not None and cards:
+            await self._remember(session_id, cards[0])
+        
+        return cards
+    
+    def _follow_up_context(self, query: str, turns: List[Tuple[str, str]]) -> Optional[str]:
+        """
+        Session context line for a follow-up ("please introduce him") whose entity an earlier turn already
+        resolved; it is sent instead of the screen summary. None when the screen still has to be read.
+        """
+        intent = self.entity_extractor.detect_intent(query)
+        if intent is None or not any(card_name == INTENT_CARD_NAMES[intent] for card_name, _ in turns):
+            return None
+        return format_session_context(turns)
+    
+    async def _remember(self, session_id: str, card: CardData):
+        """
+        Store the primary card and its entity for follow-up queries in the same session
+        """
+        field = SESSION_ENTITY_FIELDS.get(card.card_name)
+        entity = card.data.get(field) if field else None
+        if isinstance(entity, str) and entity:
+            await self.session_store.record(session_id, card.card_name, entity[:100])
+    
+    def _precomputed_analysis(self, query: str, max_cards: int) -> Optional[Dict[str, Any]]:
+        """
+        Offline analysis for frequent screen- and date-independent queries, if it covers max_cards
+        """
+        if self.precomputed is None or not is_precomputable(query):
+            return None
+        analysis = self.precomputed.lookup(query)
+        if analysis is None or len(self._ranked_candidates(analysis, max_cards)) < max_cards:
+            return None
+        return analysis
+    
+    def _local_analysis(self, query: str, max_cards: int) -> Optional[Dict[str, Any]]:
+        """
+        Conversion and translation requests parsed locally, without a model call
+        """
+        if not self.local_fast_path or max_cards != 1 or not is_screen_independent(query):
+            return None
+        
+        parameters = self.conversion_parser.parse(query)
+        if parameters:
+            return {"card_type": "Conversion", "parameters": parameters, "reasoning": "Parsed locally"}
+        
+        parameters = self.translation_parser.parse(query)
+        if parameters:
+            return {"card_type": "Translation", "parameters": parameters, "reasoning": "Parsed locally"}
+        
+        return None
+    
+    async def _analyze_sequential(self, query: str, screen_content: Optional[str], max_cards: int,
+                                  session_context: Optional[str] = None, request_class: str = INTERACTIVE,
+                                  deadline: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Run local extraction first and send the enhanced query to the model
         """
         # Pre-process screen content to extract key information
         enhanced_query = query
@@ -26,100 +190,150 @@ class CardSelector:
                 enhanced_query = extracted_info["enhanced_query"]
         
         # Analyze query using OpenAI
-        analysis = await self.openai_service.analyze_query(enhanced_query, screen_content)
+        analysis = await self._scheduled_analysis(
+            enhanced_query, screen_content, max_cards, session_context, request_class, deadline
+        )
+        return analysis, extracted_info
+    
+    async def _analyze_speculative(self, query: str, screen_content: str, max_cards: int,
+                                   session_context: Optional[str] = None, request_class: str = INTERACTIVE,
+                                   deadline: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Start the model call without waiting for screen extraction whenever extraction cannot change
+        the prompt, so the model sees exactly what the sequential path would send it.
+        Only a query that points at the screen and whose entity is found there skips the model call.
+        """
+        if self.entity_extractor.detect_intent(query) is None:
+            # Nothing on screen to resolve: the enhanced query is the query itself
+            analysis = await self._scheduled_analysis(
+                query, screen_content, max_cards, session_context, request_class, deadline
+            )
+            return analysis, {}
+        if max_cards != 1:
+            return await self._analyze_sequential(
+                query, screen_content, max_cards, session_context, request_class, deadline
+            )
         
-        card_type = analysis.get("card_type", "InfoCard")
-        parameters = analysis.get("parameters", {})
+        # Without an entity the enhanced query stays the raw one, so the speculative call is still valid
+        llm_task = asyncio.create_task(
+            self._scheduled_analysis(query, screen_content, max_cards, session_context, request_class, deadline)
+        )
+        try:
+            extracted_info = await asyncio.to_thread(self._extract_key_information, query, screen_content)
+        except BaseException:
+            _cancel_quietly(llm_task)
+            raise
         
-        # Override parameters with extracted information if available
-        if extracted_info.get("override_parameters"):
-            parameters.update(extracted_info["override_parameters"])
+        if extracted_info.get("card_type"):
+            _cancel_quietly(llm_task)
+            analysis = {
+                "card_type": extracted_info["card_type"],
+                "parameters": {},
+                "reasoning": "Resolved locally from screen content"
+            }
+            return analysis, extracted_info
         
-        # Generate card based on type
-        card_data = self._generate_card_data(card_type, parameters, query, screen_content, user_location)
+        return await llm_task, extracted_info
+    
+    async def analyze(self, query: str, screen_content: Optional[str] = None, max_cards: int = 1,
+                      request_class: str = INTERACTIVE) -> Dict[str, Any]:
+        """
+        Model analysis only (no precomputed or local answers, no card generation) in the request_class lane
+        """
+        return await self._scheduled_analysis(query, screen_content, max_cards, None, request_class, None)
+    
+    async def _scheduled_analysis(self, query: str, screen_content: Optional[str], max_cards: int,
+                                  session_context: Optional[str], request_class: str,
+                                  deadline: Optional[float]) -> Dict[str, Any]:
+        """
+        Model analysis through the request scheduler. An interactive request past its deadline gets the
+        InfoCard fallback on time; lanes that drop expired requests raise DeadlineExceeded instead.
+        """
+        if deadline is None:
+            deadline = self.scheduler.deadline(request_class)
+        try:
+            return await self.scheduler.run(
+                request_class, deadline,
+                lambda: self.openai_service.analyze_query(
+                    query, screen_content, max_cards=max_cards, session_context=session_context
+                )
+            )
+        except DeadlineExceeded as e:
+            if self.scheduler.lanes[request_class].drop_expired:
+                raise
+            print(f"Request scheduler: {e}")
+            return {
+                "card_type": "InfoCard",
+                "parameters": {"query": query},
+                "reasoning": "Default fallback due to deadline",
+                "fallback": True
+            }
+    
+    def _ranked_candidates(self, analysis: Dict[str, Any], max_cards: int) -> List[Dict[str, Any]]:
+        """
+        Normalize the analysis into a ranked list of at most max_cards distinct card types
+        """
+        candidates = analysis.get("cards")
+        if not isinstance(candidates, list) or not candidates:
+            # Single-card response shape
+            candidates = [analysis]
         
-        return [card_data]
+        ranked = []
+        seen_types = set()
+        for candidate in candidates:
+            if not isinstance(candidate, dict):
+                continue
+            card_type = candidate.get("card_type", "InfoCard")
+            if card_type in seen_types:
+                continue
+            seen_types.add(card_type)
+            ranked.append(candidate)
+            if len(ranked) >= max_cards:
+                break
+        
+        return ranked or [{"card_type": "InfoCard", "parameters": {}}]
     
     def _generate_card_data(self, card_type: str, parameters: Dict[str, Any], 
                           query: str, screen_content: Optional[str], user_location: Optional[str] = None) -> CardData:
         """
-        Generate card data based on card type and parameters
+        Generate card data based on card type and parameters, validated against the card's model
         """
         card_id = f"card-{str(uuid.uuid4())}"
         
         if card_type == "InfoCard":
-            return CardData(
-                card_name="InfoCard",
-                card_id=card_id,
-                data=self._generate_info_card_data(parameters, query)
-            )
+            card_name, generate = "InfoCard", lambda p: self._generate_info_card_data(p, query)
         elif card_type == "FlightsCard":
-            return CardData(
-                card_name="FlightsCard",
-                card_id=card_id,
-                data=self._generate_flights_card_data(parameters, query, user_location)
-            )
+            card_name, generate = "FlightsCard", lambda p: self._generate_flights_card_data(p, query, user_location)
         elif card_type == "ShoppingCard":
-            return CardData(
-                card_name="ShoppingSearchResults",
-                card_id=card_id,
-                data=self._generate_shopping_card_data(parameters, query)
-            )
+            card_name, generate = "ShoppingSearchResults", lambda p: self._generate_shopping_card_data(p, query)
         elif card_type == "YelpCard":
-            return CardData(
-                card_name="YelpCard",
-                card_id=card_id,
-                data=self._generate_yelp_card_data(parameters, query)
-            )
+            card_name, generate = "YelpCard", lambda p: self._generate_yelp_card_data(p, query)
         elif card_type == "Videos":
-            return CardData(
-                card_name="Videos",
-                card_id=card_id,
-                data=self._generate_videos_card_data(parameters, query)
-            )
+            card_name, generate = "Videos", lambda p: self._generate_videos_card_data(p, query)
         elif card_type == "Images":
-            return CardData(
-                card_name="Images",
-                card_id=card_id,
-                data=self._generate_images_card_data(parameters, query)
-            )
+            card_name, generate = "Images", lambda p: self._generate_images_card_data(p, query)
         elif card_type == "Translation":
-            return CardData(
-                card_name="Translation",
-                card_id=card_id,
-                data=self._generate_translation_card_data(parameters, query)
-            )
+            card_name, generate = "Translation", lambda p: self._generate_translation_card_data(p, query)
         elif card_type == "Conversion":
-            return CardData(
-                card_name="Conversion",
-                card_id=card_id,
-                data=self._generate_conversion_card_data(parameters, query)
-            )
+            card_name, generate = "Conversion", lambda p: self._generate_conversion_card_data(p, query)
         elif card_type == "ChatCard":
-            return CardData(
-                card_name="ChatCard",
-                card_id=card_id,
-                data=self._generate_chat_card_data(parameters, query)
-            )
+            card_name, generate = "ChatCard", lambda p: self._generate_chat_card_data(p, query)
         elif card_type == "Comparison":
-            return CardData(
-                card_name="Comparison",
-                card_id=card_id,
-                data=self._generate_comparison_card_data(parameters, query)
-            )
+            card_name, generate = "Comparison", lambda p: self._generate_comparison_card_data(p, query)
         elif card_type == "PlanningCard":
-            return CardData(
-                card_name="PlanningCard",
-                card_id=card_id,
-                data=self._generate_planning_card_data(parameters, query, screen_content)
-            )
+            card_name, generate = "PlanningCard", lambda p: self._generate_planning_card_data(p, query, screen_content)
         else:
             # Default to InfoCard
-            return CardData(
-                card_name="InfoCard",
-                card_id=card_id,
-                data=self._generate_info_card_data(parameters, query)
-            )
+            card_name, generate = "InfoCard", lambda p: self._generate_info_card_data(p, query)
+        
+        # Bad LLM values are coerced or repaired with the card's own defaults (generated from no parameters)
+        data = self.card_validator.validate(card_name, generate(parameters), lambda: generate({}))
+        
+        return CardData(
+            card_name=card_name,
+            card_id=card_id,
+            data=data
+        )
     
     def _generate_info_card_data(self, parameters: Dict[str, Any], query: str) -> Dict:
         return {"query": parameters.get("query", query)}
@@ -137,12 +351,22 @@ class CardSelector:
         if not arrival:
             arrival = parameters.get("arrival_airport", "")
         
+        # Resolve places to IATA codes locally; unresolved strings are passed through
+        departure_codes = self.airport_index.resolve(departure) if departure else []
+        arrival_codes = self.airport_index.resolve(arrival) if arrival else []
+        
         # Use user_location as default departure if no departure location found
         if not departure and user_location:
+            departure_codes = self._airports_near(user_location)
             departure = user_location
         elif not departure:
             departure = "SFO"  # Final fallback
         
+        if departure_codes:
+            departure = departure_codes[0]
+        if arrival_codes:
+            arrival = arrival_codes[0]
+        
         # Handle trip_start_date with past date validation
         trip_start_date = parameters.get("trip_start_date") or tomorrow
         trip_start_date = self._validate_future_date(trip_start_date, tomorrow)
@@ -159,98 +383,65 @@ class CardSelector:
             "suggestions": parameters.get("suggestions")
         }
         
-        # Generate suggestions if required parameters are missing
-        if not data["departure_location"] and not data["suggestions"]:
-            data["suggestions"] = [{
-                "departure_location": "SFO",
-                "arrival_location": "LAX",
-                "trip_start_date": tomorrow,
-                "trip_end_date": None,
-                "adults": 1,
-                "children": 0,
-                "infants": 0,
-                "flight_class": "ECONOMY",
-                "reason": "Popular destination with many flight options."
-            }]
+        # Suggest the other airports of multi-airport cities (NYC, London, Tokyo...)
+        if not data["suggestions"]:
+            data["suggestions"] = self._alternate_airport_suggestions(data, departure_codes, arrival_codes) or None
         
         return data
     
+    def _airports_near(self, user_location: str) -> List[str]:
+        """
+        Airports for an X-Brain-User-Location value: nearest to lat/long, or resolved by place name
+        """
+        coordinates, place = parse_user_location(user_location)
+        if coordinates:
+            nearest = self.airport_index.nearest(*coordinates)
+            return [nearest] if nearest else []
+        return self.airport_index.resolve(place) if place else []
+    
+    def _alternate_airport_suggestions(self, data: Dict[str, Any], departure_codes: List[str],
+                                       arrival_codes: List[str]) -> List[Dict[str, Any]]:
+        suggestions = []
+        for code in departure_codes[1:]:
+            suggestions.append({**data, "departure_location": code,
+                                "reason": f"Alternative departure airport: {self.airport_index.describe(code)}"})
+        for code in arrival_codes[1:]:
+            suggestions.append({**data, "arrival_location": code,
+                                "reason": f"Alternative arrival airport: {self.airport_index.describe(code)}"})
+        for suggestion in suggestions:
+            del suggestion["suggestions"]
+        return suggestions[:3]
+    
     def _extract_key_information(self, query: str, screen_content: str) -> Dict[str, Any]:
         """
-        Extract key information from screen content based on user query
+        Extract key information from screen content based on user query.
+        Sets "card_type" when the local result alone is enough to pick the card.
         """
-        query_lower = query.lower()
-        extracted_texts = self.screen_processor.extract_text_content(screen_content)
+        with stage("screen_extraction"):
+            extracted_texts = self.screen_processor.extract_text_content(screen_content)
+            extracted = self.entity_extractor.extract(query, (item.text for item in extracted_texts))
         
         result = {}
+        if not extracted:
+            return result
+        intent, entity = extracted
         
-        # Shopping queries - extract product names
-        if query_lower == "help me buy the product":
-            product_candidates = []
-            for text_item in extracted_texts:
-                text = text_item['text'].strip()
-                
-                # Skip if too long (likely full sentences) or too short
-                if len(text) < 2 or len(text) > 10:
-                    continue
-                    
-                # Look for Chinese product names or specific words
-                if any('\u4e00' <= char <= '\u9fff' for char in text):
-                    # Extract product name from questions like "你知道拉布布吗"
-                    if '吗' in text and len(text.replace('你知道', '').replace('吗', '').strip()) > 1:
-                        product_name = text.replace('你知道', '').replace('吗', '').strip()
-                        product_candidates.append(product_name)
-                    elif not any(word in text for word in ['你', '我', '他', '她', '吗', '呢', '的']):
-                        # Direct product names without question words
-                        product_candidates.append(text)
-            
-            if product_candidates:
-                # Use the shortest candidate as it's likely the product name
-                best_product = min(product_candidates, key=len)
-                result["override_parameters"] = {
-                    "search_query": best_product,
-                    "platforms": "Amazon"
-                }
-                result["enhanced_query"] = f"help me buy {best_product}"
+        # Shopping queries - product names
+        if intent == SHOPPING_INTENT:
+            result["card_type"] = "ShoppingCard"
+            result["override_parameters"] = {
+                "search_query": entity,
+                "platforms": "Amazon"
+            }
+            result["enhanced_query"] = f"help me buy {entity}"
         
-        # Info queries - extract person names
-        elif query_lower == "please introduce him":
-            name_candidates = []
-            
-            for text_item in extracted_texts:
-                text = text_item['text'].strip()
-                
-                # Skip very short or very long texts
-                if len(text) < 3 or len(text) > 50:
-                    continue
-                
-                # Look for specific names or keywords
-                text_lower = text.lower()
-                
-                # Check for Michael Jordan specific references
-                if any(keyword in text_lower for keyword in ['jordan', 'michael', '乔丹', '迈克尔']):
-                    name_candidates.append("michael jordan")
-                    break
-                
-                # Check for Chinese names (typically 2-4 characters)
-                if (any('\u4e00' <= char <= '\u9fff' for char in text) and 
-                    2 <= len(text) <= 4 and
-                    not any(word in text for word in ['百科', '词条', '编辑', '维护', '指南'])):
-                    name_candidates.append(text)
-                
-                # Check for English names (First Last pattern)
-                if (text.replace(' ', '').isalpha() and 
-                    len(text.split()) == 2 and
-                    all(word.istitle() for word in text.split())):
-                    name_candidates.append(text)
-            
-            if name_candidates:
-                # Prioritize "michael jordan" if found, otherwise use first candidate
-                best_name = "michael jordan" if "michael jordan" in name_candidates else name_candidates[0]
-                result["override_parameters"] = {
-                    "query": best_name
-                }
-                result["enhanced_query"] = f"please introduce {best_name}"
+        # Info queries - person names
+        elif intent == PERSON_INTENT:
+            result["card_type"] = "InfoCard"
+            result["override_parameters"] = {
+                "query": entity
+            }
+            result["enhanced_query"] = f"please introduce {entity}"
         
         return result
     
@@ -0,0 +1,91 @@
+from typing import Any, Callable, Dict, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from models.card_models import (
+    ChatCardData, ComparisonCardData, ConversionCardData, FlightsCardData, ImagesCardData, InfoCardData,
+    PlanningCardData, ShoppingCardData, TranslationCardData, VideosCardData, YelpCardData
+)
+
+# card_name (as sent to clients) -> data model
+CARD_MODELS: Dict[str, Type[BaseModel]] = {
+    "InfoCard": InfoCardData,
+    "FlightsCard": FlightsCardData,
+    "ShoppingSearchResults": ShoppingCardData,
+    "YelpCard": YelpCardData,
+    "Videos": VideosCardData,
+    "Images": ImagesCardData,
+    "Translation": TranslationCardData,
+    "Conversion": ConversionCardData,
+    "ChatCard": ChatCardData,
+    "Comparison": ComparisonCardData,
+    "PlanningCard": PlanningCardData,
+}
+
+
+class CardValidator:
+    """
+    Validates and coerces card data against models/card_models.py with adapters built once.
+    Invalid fields are repaired locally instead of re-querying the model.
+    """
+    
+    def __init__(self):
+        self._adapters: Dict[str, TypeAdapter] = {name: TypeAdapter(model) for name, model in CARD_MODELS.items()}
+        self.repaired = 0
+        self.failed = 0
+    
+    def validate(self, card_name: str, data: Dict[str, Any], fallback: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return validated, coerced card data ("2" adults -> 2). On failure, bad fields are
+        repaired (numbers stringified, otherwise replaced with the card's default from fallback())
+        and validated once more; if that still fails the unvalidated data is returned.
+        """
+        adapter = self._adapters.get(card_name)
+        if adapter is None:
+            return data
+        
+        try:
+            return adapter.dump_python(adapter.validate_python(data))
+        except ValidationError as e:
+            repaired = self._repair(data, e, fallback)
+        
+        try:
+            result = adapter.dump_python(adapter.validate_python(repaired))
+            self.repaired += 1
+            return result
+        except ValidationError as e:
+            self.failed += 1
+            print(f"Card data for {card_name} failed validation after repair: {e}")
+            return data
+    
+    def _repair(self, data: Dict[str, Any], error: ValidationError, fallback: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        repaired = dict(data)
+        defaults = None
+        for detail in error.errors():
+            if not detail["loc"]:
+                continue
+            field = detail["loc"][0]
+            value = data.get(field)
+            
+            # The LLM often returns numbers for string fields ("input_value": 100)
+            if (len(detail["loc"]) == 1 and detail["type"] == "string_type" and
+                    isinstance(value, (int, float)) and not isinstance(value, bool)):
+                repaired[field] = str(value)
+                continue
+            
+            if defaults is None:
+                defaults = fallback()
+            repaired[field] = defaults.get(field)
+        return repaired
+
+
+_card_validator = None
+
+def get_card_validator() -> CardValidator:
+    """
+    Return the process-wide CardValidator
+    """
+    global _card_validator
+    if _card_validator is None:
+        _card_validator = CardValidator()
+    return _card_validator
@@ -0,0 +1,142 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Intents the local extractor can resolve without the model
+SHOPPING_INTENT = "shopping"
+PERSON_INTENT = "person"
+
+_CJK = re.compile('[\u4e00-\u9fff]')
+
+# End of the deictic phrase: the clause ends, or only a courtesy word follows ("buy this for me")
+_CLAUSE_END = r"(?=\s*(?:$|[,.!?;，。！？；]|(?:for\s+me|please|now|online)\b))"
+_CJK_CLAUSE_END = '(?=$|[\\s,.!?，。！？吧呢吗])'
+
+# Deictic paraphrases only, e.g. "help me buy the product", "I want to purchase this", "帮我买这个".
+# The pronoun must directly follow the verb, so "buy a laptop, is it good?" does not match.
+_SHOPPING_QUERY = re.compile(
+    r"\b(?:buy|purchase|order|shop\s+for)\s+(?:me\s+)?"
+    r"(?:it|this|that|these|those|(?:this|that|the)\s+(?:product|item|thing|one))" + _CLAUSE_END +
+    "|(?:买|购买|下单)(?:这个|那个|它|这件|同款)(?:商品|东西|产品)?" + _CJK_CLAUSE_END,
+    re.IGNORECASE
+)
+_PERSON_QUERY = re.compile(
+    r"\b(?:introduce|tell\s+me\s+(?:more\s+)?about)\s+(?:him|her|(?:this|that)\s+(?:person|guy|man|woman))"
+    + _CLAUSE_END +
+    r"|\b(?:who\s+is|who's)\s+(?:he|she|this|that|(?:this|that)\s+(?:person|guy|man|woman))" + _CLAUSE_END +
+    "|介绍(?:一下)?(?:他|她|这个人)" + _CJK_CLAUSE_END + "|^(?:他|她|这个人)是谁",
+    re.IGNORECASE
+)
+
+
+def detect_intent(query: str) -> Optional[str]:
+    """
+    Return SHOPPING_INTENT or PERSON_INTENT when the query refers to something on screen
+    """
+    if _SHOPPING_QUERY.search(query):
+        return SHOPPING_INTENT
+    if _PERSON_QUERY.search(query):
+        return PERSON_INTENT
+    return None
+
+
+# "你知道拉布布吗" -> "拉布布"
+_PRODUCT_QUESTION = re.compile(r"^(?:你知道|你听说过|你了解)?\s*(.+?)\s*吗[?？]?$")
+_PRONOUNS_AND_PARTICLES = re.compile('[你我他她吗呢的]')
+_ENCYCLOPEDIA_CHROME = re.compile('百科|词条|编辑|维护|指南')
+_ENGLISH_NAME = re.compile(r"^[A-Z][a-z]+ [A-Z][a-z]+$")
+
+# Well-known people whose mention anywhere on screen is decisive
+KNOWN_PEOPLE: Dict[str, List[str]] = {
+    "michael jordan": ["jordan", "michael", "乔丹", "迈克尔"],
+}
+
+
+class EntityExtractor:
+    """
+    Local product and person name extraction from screen text, built from precompiled patterns
+    """
+    
+    def __init__(self, known_people: Optional[Dict[str, List[str]]] = None):
+        known_people = KNOWN_PEOPLE if known_people is None else known_people
+        self._alias_to_person = {
+            alias.lower(): person for person, aliases in known_people.items() for alias in aliases
+        }
+        # One alternation over every alias, so each text is scanned once
+        self._known_people_pattern = (
+            re.compile("|".join(re.escape(alias) for alias in sorted(self._alias_to_person, key=len, reverse=True)),
+                       re.IGNORECASE)
+            if self._alias_to_person else None
+        )
+    
+    def detect_intent(self, query: str) -> Optional[str]:
+        """
+        Return SHOPPING_INTENT or PERSON_INTENT when the query refers to something on screen
+        """
+        return detect_intent(query)
+    
+    def extract(self, query: str, texts: Iterable[str]) -> Optional[Tuple[str, str]]:
+        """
+        Detect the query intent and pull the matching entity out of the screen texts.
+        Returns (intent, entity) or None.
+        """
+        intent = self.detect_intent(query)
+        if intent == SHOPPING_INTENT:
+            entity = self.extract_product(texts)
+        elif intent == PERSON_INTENT:
+            entity = self.extract_person(texts)
+        else:
+            return None
+        return (intent, entity) if entity else None
+    
+    def extract_product(self, texts: Iterable[str]) -> Optional[str]:
+        """
+        Shortest short CJK text that looks like a product name
+        """
+        best = None
+        for text in texts:
+            text = text.strip()
+            
+            # Skip if too long (likely full sentences) or too short
+            if len(text) < 2 or len(text) > 10 or not _CJK.search(text):
+                continue
+            
+            question = _PRODUCT_QUESTION.match(text)
+            if question:
+                candidate = question.group(1)
+                if len(candidate) <= 1:
+                    continue
+            elif _PRONOUNS_AND_PARTICLES.search(text):
+                continue
+            else:
+                candidate = text
+            
+            if best is None or len(candidate) < len(best):
+                best = candidate
+        return best
+    
+    def extract_person(self, texts: Iterable[str]) -> Optional[str]:
+        """
+        A known person mentioned on screen, otherwise the first name-like text
+        """
+        first_candidate = None
+        for text in texts:
+            text = text.strip()
+            
+            # Skip very short or very long texts
+            if len(text) < 3 or len(text) > 50:
+                continue
+            
+            if self._known_people_pattern is not None:
+                known = self._known_people_pattern.search(text)
+                if known:
+                    return self._alias_to_person[known.group(0).lower()]
+            
+            if first_candidate is not None:
+                continue
+            
+            # Chinese names are typically 2-4 characters
+            if len(text) <= 4 and _CJK.search(text) and not _ENCYCLOPEDIA_CHROME.search(text):
+                first_candidate = text
+            elif _ENGLISH_NAME.match(text):
+                first_candidate = text
+        return first_candidate
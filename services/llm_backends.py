@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from config import PLACEHOLDER_API_KEYS, Config
+
+
+def completion_key(query: str, screen_content: Optional[str], max_cards: int, turns: int) -> str:
+    """
+    Stable across days (the prompt's current date is not part of it); the turn count keeps a
+    fix-your-JSON continuation apart from the first call
+    """
+    raw = json.dumps([query, screen_content or "", max_cards, turns], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CompletionRequest:
+    """
+    One chat completion: the messages sent upstream plus the request fields they were built from,
+    so recording and mock backends can key on them without parsing the prompt
+    """
+    __slots__ = ("messages", "query", "screen_content", "max_cards")
+
+    def __init__(self, messages: List[dict], query: str = "", screen_content: Optional[str] = None,
+                 max_cards: int = 1):
+        self.messages = messages
+        self.query = query
+        self.screen_content = screen_content
+        self.max_cards = max_cards
+
+    def key(self) -> str:
+        return completion_key(self.query, self.screen_content, self.max_cards, len(self.messages))
+
+
+class LLMBackend(ABC):
+    """
+    Produces the raw text of a chat completion. timeout bounds one call in seconds and
+    pool_size bounds concurrent calls (connections for HTTP backends).
+    """
+    name = "base"
+
+    def __init__(self, timeout: float, pool_size: int):
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+    def warm_up(self):
+        pass
+
+    @abstractmethod
+    async def complete(self, request: CompletionRequest) -> str:
+        """
+        Raw completion text for the request's messages
+        """
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Any server speaking the OpenAI chat completions API: the hosted proxy, vLLM, or a llama.cpp server
+    on this host (name "local", with a small pool and a long timeout since it decodes one request per slot)
+    """
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: str, model: str, temperature: float = 0.3,
+                 timeout: float = 30.0, connect_timeout: float = 5.0, pool_size: int = 100,
+                 max_retries: int = 2, name: Optional[str] = None):
+        super().__init__(timeout, pool_size)
+        if name:
+            self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        Lazily build the client so importing this module does not pull in openai
+        """
+        if self._client is None:
+            import httpx
+            import openai
+
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=self.max_retries,
+                http_client=httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                    limits=httpx.Limits(max_connections=self.pool_size,
+                                        max_keepalive_connections=self.pool_size)
+                )
+            )
+        return self._client
+
+    def warm_up(self):
+        self.client
+
+    async def complete(self, request: CompletionRequest) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=request.messages,
+            temperature=self.temperature
+        )
+        return response.choices[0].message.content or ""
+
+
+class MockBackend(LLMBackend):
+    """
+    Serves recorded completions for deterministic benchmarks and tests. Recordings are JSONL lines
+    with "key" (CompletionRequest.key) or "query", and "content"; repeated keys are served in turn.
+    Misses go to responder, or raise LookupError without one. latency simulates upstream wait.
+    """
+    name = "mock"
+
+    def __init__(self, recordings_path: Optional[str] = None,
+                 responder: Optional[Callable[[CompletionRequest], str]] = None,
+                 latency: float = 0.0, timeout: float = 30.0, pool_size: int = 100):
+        super().__init__(timeout, pool_size)
+        self.responder = responder
+        self.latency = latency
+        self._recordings: Dict[str, Deque[str]] = {}
+        self._semaphore = asyncio.Semaphore(pool_size)
+        if recordings_path:
+            self.load(recordings_path)
+
+    def load(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                self.add(record.get("key") or record["query"], record["content"])
+
+    def add(self, key: str, content: str):
+        self._recordings.setdefault(key, deque()).append(content)
+
+    async def complete(self, request: CompletionRequest) -> str:
+        async with self._semaphore:
+            if self.latency:
+                await asyncio.wait_for(asyncio.sleep(self.latency), self.timeout)
+            return self._lookup(request)
+
+    def _lookup(self, request: CompletionRequest) -> str:
+        for key in (request.key(), request.query):
+            recorded = self._recordings.get(key)
+            if recorded:
+                content = recorded[0]
+                recorded.rotate(-1)
+                return content
+        if self.responder is None:
+            raise LookupError(f"No recorded completion for query: {request.query}")
+        return self.responder(request)
+
+
+def create_llm_backend(responder: Optional[Callable[[CompletionRequest], str]] = None) -> LLMBackend:
+    """
+    Build the backend selected by LLM_BACKEND. responder answers mock-backend misses.
+    Raises ValueError for an unknown backend or when the openai backend has no OPENAI_API_KEY.
+    """
+    backend = Config.LLM_BACKEND
+    if backend == "openai":
+        if (Config.OPENAI_API_KEY or "") in PLACEHOLDER_API_KEYS:
+            raise ValueError("LLM_BACKEND=openai requires OPENAI_API_KEY to be set in the environment "
+                             "(use LLM_BACKEND=mock to run without an upstream)")
+        return OpenAICompatibleBackend(
+            Config.LLM_BASE_URL, Config.OPENAI_API_KEY, Config.LLM_MODEL,
+            temperature=Config.LLM_TEMPERATURE,
+            timeout=Config.LLM_TIMEOUT_SECONDS,
+            connect_timeout=Config.LLM_CONNECT_TIMEOUT_SECONDS,
+            pool_size=Config.LLM_POOL_SIZE,
+            max_retries=Config.LLM_MAX_RETRIES
+        )
+    if backend == "local":
+        return OpenAICompatibleBackend(
+            Config.LOCAL_LLM_BASE_URL, "sk-no-key-required", Config.LOCAL_LLM_MODEL,
+            temperature=Config.LLM_TEMPERATURE,
+            timeout=Config.LOCAL_LLM_TIMEOUT_SECONDS,
+            connect_timeout=Config.LLM_CONNECT_TIMEOUT_SECONDS,
+            pool_size=Config.LOCAL_LLM_POOL_SIZE,
+            max_retries=0,
+            name="local"
+        )
+    if backend == "mock":
+        return MockBackend(
+            Config.MOCK_LLM_RECORDINGS or None,
+            responder=responder,
+            latency=Config.MOCK_LLM_LATENCY_MS / 1000,
+            timeout=Config.LLM_TIMEOUT_SECONDS,
+            pool_size=Config.LLM_POOL_SIZE
+        )
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
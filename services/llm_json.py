@@ -0,0 +1,169 @@
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Card types the analysis prompt allows
+CARD_TYPES = frozenset([
+    "InfoCard", "FlightsCard", "ShoppingCard", "YelpCard", "Videos", "Images",
+    "Translation", "Conversion", "ChatCard", "Comparison", "PlanningCard",
+])
+
+# How each analysis was obtained: direct, extracted, repaired, retried (after a fix-your-JSON call),
+# failed (still unusable after the retry) or api_error
+PARSE_OUTCOMES: Counter = Counter()
+
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def extract_first_object(text: str) -> Optional[str]:
+    """
+    The first balanced {...} in text, ignoring braces inside strings. Prose, code fences and
+    anything after the object are dropped. A truncated object is returned as-is for repair.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    depth, quote, escaped = 0, None, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix common LLM JSON defects outside of strings: single-quoted strings, trailing commas,
+    Python True/False/None, // comments, and unterminated strings/objects at the end
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    quote, escaped = None, False
+    i, length = 0, len(text)
+    while i < length:
+        char = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+                # \' is not a valid JSON escape
+                out.append("'" if char == "'" else "\\" + char)
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+            i += 1
+            continue
+        
+        if char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            stack.append(_CLOSERS[char])
+            out.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            out.append(char)
+        elif char == ",":
+            j = i + 1
+            while j < length and text[j].isspace():
+                j += 1
+            if j < length and text[j] in "}]":
+                i += 1
+                continue
+            out.append(char)
+        elif char == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = length if newline == -1 else newline
+            continue
+        elif char.isalpha():
+            j = i
+            while j < length and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(char)
+        i += 1
+    
+    if quote:
+        out.append('"')
+    repaired = "".join(out)
+    if stack:
+        # A truncated '{"a": 1,' must not keep its comma in front of the appended closers
+        repaired = repaired.rstrip().rstrip(",")
+    return repaired + "".join(reversed(stack))
+
+
+def valid_analysis(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Check a parsed completion against the analysis schema (single card or a "cards" list).
+    Invalid entries of a "cards" list are dropped; None when no valid card is left.
+    """
+    if not isinstance(data, dict):
+        return None
+    cards = data.get("cards")
+    if cards is not None:
+        if not isinstance(cards, list):
+            return None
+        valid_cards = [card for card in cards if _is_valid_card(card)]
+        if not valid_cards:
+            return None
+        if len(valid_cards) < len(cards):
+            data = dict(data, cards=valid_cards)
+        return data
+    return data if _is_valid_card(data) else None
+
+
+def _is_valid_card(card: Any) -> bool:
+    return (isinstance(card, dict) and card.get("card_type") in CARD_TYPES and
+            isinstance(card.get("parameters", {}), dict))
+
+
+def parse_llm_json(content: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Parse a completion into an analysis dict. Returns (analysis, outcome) where outcome is
+    "direct", "extracted" or "repaired", or (None, "failed"/"invalid") when nothing usable was found.
+    """
+    text = (content or "").strip()
+    candidates = [("direct", text)]
+    snippet = extract_first_object(text)
+    if snippet is not None:
+        if snippet != text:
+            candidates.append(("extracted", snippet))
+        candidates.append(("repaired", repair_json(snippet)))
+    
+    parsed_any = False
+    for outcome, candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except (json.JSONDecodeError, ValueError):
+            continue
+        parsed_any = True
+        analysis = valid_analysis(data)
+        if analysis is not None:
+            return analysis, outcome
+    return None, "invalid" if parsed_any else "failed"
@@ -1,29 +1,14 @@
-import openai
-import os
-from typing import Optional
 import json
+from typing import Optional
+from .entity_extractor import EntityExtractor, PERSON_INTENT, SHOPPING_INTENT
+from .llm_backends import CompletionRequest, MockBackend, create_llm_backend
+from .llm_json import PARSE_OUTCOMES, parse_llm_json
+from .request_stages import stage
 from .screen_content_processor import ScreenContentProcessor
+from .traffic_capture import record_upstream
 
-class OpenAIService:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        self.test_mode = api_key == "OPENAI_API_KEY" or not api_key
-        self.screen_processor = ScreenContentProcessor()
-        
-        if not self.test_mode:
-            # Use Cerebras proxy endpoint instead of OpenAI
-            self.client = openai.AsyncOpenAI(
-                api_key="DlJYSkMVj1x4zoe8jZnjvxfHG6z5yGxK",
-                base_url="https://cerebras-proxy.brain.loocaa.com:1443/v1"
-            )
-        else:
-            print("Running in test mode - no real API calls will be made")
-    
-    async def analyze_query(self, query: str, screen_content: Optional[str] = None) -> dict:
-        """
-        Analyze user query and screen content to determine the most suitable card type
-        """
-        system_prompt = """
+# Built once at import time instead of on every analyze_query call
+SYSTEM_PROMPT = """
 You are an AI assistant that analyzes user queries and determines the most suitable card type to display.
 
 Available card types:
@@ -91,47 +76,109 @@ For Translation, use these exact parameter names:
 - "output_language": target language
 - "output_text": translated result (optional)
 """
+
+# Appended to the user message when the client asks for alternatives, so the system prompt stays fixed
+MULTI_CARD_INSTRUCTION = """
+Return up to {max_cards} alternative cards ranked from most to least suitable, using distinct card types.
+Respond with a JSON object of this structure instead:
+{{
+    "cards": [
+        {{"card_type": "CardName", "parameters": {{...}}, "reasoning": "explanation"}}
+    ]
+}}"""
+
+# Continuation sent once when a completion cannot be parsed or repaired locally
+FIX_JSON_INSTRUCTION = "Your previous reply was not valid JSON for the required structure. Reply with only the corrected JSON object."
+
+
+class OpenAIService:
+    def __init__(self, backend=None):
+        self.screen_processor = ScreenContentProcessor()
+        self.entity_extractor = EntityExtractor()
+        self.backend = backend or create_llm_backend(responder=self._test_completion)
+        self._system_message = {"role": "system", "content": SYSTEM_PROMPT}
+        
+        if isinstance(self.backend, MockBackend):
+            print("Running with the mock LLM backend - no real API calls will be made")
+    
+    def warm_up(self):
+        """
+        Build the upstream client ahead of the first request
+        """
+        self.backend.warm_up()
+    
+    async def analyze_query(self, query: str, screen_content: Optional[str] = None, max_cards: int = 1,
+                            session_context: Optional[str] = None) -> dict:
+        """
+        Analyze user query and screen content to determine the most suitable card type.
+        With max_cards > 1 the model is asked for a ranked "cards" list in the same completion.
+        A session_context line (a follow-up whose entity the session already resolved) replaces the screen summary.
+        """
         
         from datetime import datetime
         current_date = datetime.now().strftime("%Y-%m-%d")
         current_day = datetime.now().strftime("%A")
         
-        user_content = f"Query: {query}\nCurrent Date: {current_date} ({current_day})"
-        if screen_content:
-            # Process screen content to extract meaningful information
-            screen_summary = self.screen_processor.get_context_summary(screen_content)
-            user_content += f"\n{screen_summary}"
+        with stage("prompt_build"):
+            user_content = f"Query: {query}\nCurrent Date: {current_date} ({current_day})"
+            if session_context:
+                # Follow-up about something already resolved in this session
+                user_content += f"\n{session_context}"
+            elif screen_content:
+                # Process screen content to extract meaningful information
+                screen_summary = self.screen_processor.get_context_summary(screen_content)
+                user_content += f"\n{screen_summary}"
+            if max_cards > 1:
+                user_content += MULTI_CARD_INSTRUCTION.format(max_cards=max_cards)
         
-        if self.test_mode:
-            return self._get_test_response(query, screen_content)
-            
+        request = CompletionRequest(
+            [self._system_message, {"role": "user", "content": user_content}],
+            query, screen_content, max_cards
+        )
         try:
-            response = await self.client.chat.completions.create(
-                model="qwen-3-235b-a22b-instruct-2507",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                temperature=0.3
-            )
-            
-            content = response.choices[0].message.content
-            print(f"OpenAI response content: {content}")
+            content = await self._complete(request)
+            print(f"LLM response content ({self.backend.name}): {content}")
             
-            # Handle JSON code blocks
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "").strip()
-            elif content.startswith("```"):
-                content = content.replace("```", "").strip()
-            
-            return json.loads(content)
+            analysis, outcome = parse_llm_json(content)
+            if analysis is None:
+                # Only pay for a second call when local repair could not recover the completion
+                request = CompletionRequest(
+                    request.messages + [
+                        {"role": "assistant", "content": content},
+                        {"role": "user", "content": FIX_JSON_INSTRUCTION}
+                    ],
+                    query, screen_content, max_cards
+                )
+                analysis, outcome = parse_llm_json(await self._complete(request))
+                outcome = "retried" if analysis is not None else "failed"
+            PARSE_OUTCOMES[outcome] += 1
+            if analysis is not None:
+                return analysis
+            reasoning = "Default fallback due to unparseable response"
         except Exception as e:
-            print(f"OpenAI API error: {e}")
-            return {
-                "card_type": "InfoCard",
-                "parameters": {"query": query},
-                "reasoning": "Default fallback due to API error"
-            }
+            print(f"LLM backend error ({self.backend.name}): {e}")
+            PARSE_OUTCOMES["api_error"] += 1
+            reasoning = "Default fallback due to API error"
+        
+        return {
+            "card_type": "InfoCard",
+            "parameters": {"query": query},
+            "reasoning": reasoning,
+            "fallback": True
+        }
+    
+    async def _complete(self, request: CompletionRequest) -> str:
+        with stage("upstream", waiting=True):
+            try:
+                content = await self.backend.complete(request)
+            except Exception as e:
+                record_upstream(request, error=str(e) or type(e).__name__)
+                raise
+        record_upstream(request, content)
+        return content
+    
+    def _test_completion(self, request: CompletionRequest) -> str:
+        return json.dumps(self._get_test_response(request.query, request.screen_content), ensure_ascii=False)
     
     def _get_test_response(self, query: str, screen_content: Optional[str] = None) -> dict:
         """
@@ -142,32 +189,13 @@ For Translation, use these exact parameter names:
         # Handle specific test cases with screen content
         if screen_content:
             # Extract meaningful content from screen
-            extracted_texts = self.screen_processor.extract_text_content(screen_content)
+            extracted_texts = [item.text for item in self.screen_processor.extract_text_content(screen_content)]
+            intent = self.entity_extractor.detect_intent(query)
             
             # Shopping case: "help me buy the product"
-            if query_lower == "help me buy the product":
-                # Look for product names in extracted text, prioritizing short product names
-                product_candidates = []
-                for text_item in extracted_texts:
-                    text = text_item['text'].strip()
-                    
-                    # Skip if too long (likely full sentences) or too short
-                    if len(text) < 2 or len(text) > 10:
-                        continue
-                        
-                    # Look for Chinese product names or specific words
-                    if any('\u4e00' <= char <= '\u9fff' for char in text):
-                        # Extract product name from questions like "你知道拉布布吗"
-                        if '吗' in text and len(text.replace('你知道', '').replace('吗', '').strip()) > 1:
-                            product_name = text.replace('你知道', '').replace('吗', '').strip()
-                            product_candidates.append(product_name)
-                        elif not any(word in text for word in ['你', '我', '他', '她', '吗', '呢', '的']):
-                            # Direct product names without question words
-                            product_candidates.append(text)
-                
-                if product_candidates:
-                    # Use the shortest candidate as it's likely the product name
-                    best_product = min(product_candidates, key=len)
+            if intent == SHOPPING_INTENT:
+                best_product = self.entity_extractor.extract_product(extracted_texts)
+                if best_product:
                     return {
                         "card_type": "ShoppingCard",
                         "parameters": {
@@ -180,40 +208,9 @@ For Translation, use these exact parameter names:
                     }
             
             # Info case: "please introduce him"
-            elif query_lower == "please introduce him":
-                # Look for person names, prioritizing recognizable names
-                name_candidates = []
-                
-                for text_item in extracted_texts:
-                    text = text_item['text'].strip()
-                    
-                    # Skip very short or very long texts
-                    if len(text) < 3 or len(text) > 50:
-                        continue
-                    
-                    # Look for specific names or keywords
-                    text_lower = text.lower()
-                    
-                    # Check for Michael Jordan specific references
-                    if any(keyword in text_lower for keyword in ['jordan', 'michael', '乔丹', '迈克尔']):
-                        name_candidates.append("michael jordan")
-                        break
-                    
-                    # Check for Chinese names (typically 2-4 characters)
-                    if (any('\u4e00' <= char <= '\u9fff' for char in text) and 
-                        2 <= len(text) <= 4 and
-                        not any(word in text for word in ['百科', '词条', '编辑', '维护', '指南'])):
-                        name_candidates.append(text)
-                    
-                    # Check for English names (First Last pattern)
-                    if (text.replace(' ', '').isalpha() and 
-                        len(text.split()) == 2 and
-                        all(word.istitle() for word in text.split())):
-                        name_candidates.append(text)
-                
-                if name_candidates:
-                    # Prioritize "michael jordan" if found, otherwise use first candidate
-                    best_name = "michael jordan" if "michael jordan" in name_candidates else name_candidates[0]
+            elif intent == PERSON_INTENT:
+                best_name = self.entity_extractor.extract_person(extracted_texts)
+                if best_name:
                     return {
                         "card_type": "InfoCard",
                         "parameters": {
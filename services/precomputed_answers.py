@@ -0,0 +1,135 @@
+import json
+import mmap
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .entity_extractor import detect_intent
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[\s\.,!?;:。，！？；：]+|[\s\.,!?;:。，！？；：]+$")
+
+# Words that point at something on the current screen, so the answer cannot be shared.
+# Paraphrases such as "buy the product" or "帮我买同款" are caught by the entity extractor's intents.
+_SCREEN_REFERENCES = re.compile(
+    r"\b(?:this|that|these|those|it|him|her|them|here|above|below|screen)\b|这个|那个|这些|他|她|它|屏幕|上面",
+    re.IGNORECASE
+)
+# Dates relative to the day of the request ("flights tomorrow", "明天天气"); a stored answer would go stale
+_RELATIVE_DATES = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|now|currently|this\s+(?:morning|afternoon|evening|week|weekend|month|year)"
+    r"|(?:next|last|this\s+coming)\s+\w+|in\s+\d+\s+(?:days?|weeks?|months?)|(?:mon|tues|wednes|thurs|fri|satur|sun)days?)\b"
+    "|今天|今晚|今日|明天|明晚|明日|后天|大后天|昨天|前天|现在|目前|本周|这周|下周|上周|周末|下个?月|上个?月|本月|今年|明年|去年"
+    "|(?:星期|礼拜|周)[一二三四五六日天]",
+    re.IGNORECASE
+)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a query: lowercased, whitespace collapsed, edge punctuation removed
+    """
+    return _EDGE_PUNCTUATION.sub("", _WHITESPACE.sub(" ", query.lower()))
+
+
+def is_screen_independent(query: str) -> bool:
+    """
+    True when the query can be answered without looking at the screen
+    """
+    return not _SCREEN_REFERENCES.search(query) and detect_intent(query) is None
+
+
+def is_precomputable(query: str) -> bool:
+    """
+    True when an answer computed offline is still right whenever the query is served:
+    it neither refers to the screen nor to a date relative to today
+    """
+    return is_screen_independent(query) and not _RELATIVE_DATES.search(query)
+
+
+def write_precomputed_answers(path: str, answers: Iterable[Tuple[str, Dict[str, Any]]]):
+    """
+    Write "<normalized query>\\t<analysis json>" lines atomically, so a running server can hot-reload
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for query, analysis in answers:
+            f.write(normalize_query(query))
+            f.write("\t")
+            f.write(json.dumps(analysis, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+
+class PrecomputedAnswers:
+    """
+    Memory-mapped table of precomputed analyses for frequent, screen-independent queries.
+    Only the key index lives on the heap; analyses are decoded from the mapping on a hit.
+    """
+    
+    def __init__(self, path: str, reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mapping: Optional[mmap.mmap] = None
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+    
+    def load(self):
+        """
+        (Re)build the mapping and key index if the file changed since the last load
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._mapping is not None:
+                print(f"Precomputed answers file {self.path} removed, serving without it")
+                self._mapping.close()
+            self._mapping, self._index, self._mtime = None, {}, None
+            return
+        if stat.st_mtime == self._mtime:
+            return
+        
+        mapping, index = None, {}
+        if stat.st_size:
+            with open(self.path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            position = 0
+            while position < len(mapping):
+                line_end = mapping.find(b"\n", position)
+                if line_end == -1:
+                    line_end = len(mapping)
+                tab = mapping.find(b"\t", position, line_end)
+                if tab != -1:
+                    index[mapping[position:tab].decode("utf-8")] = (tab + 1, line_end)
+                position = line_end + 1
+        
+        # Lookups run synchronously on the event loop, so none can still be reading the old mapping
+        previous = self._mapping
+        self._mapping, self._index, self._mtime = mapping, index, stat.st_mtime
+        if previous is not None:
+            previous.close()
+        print(f"Loaded {len(index)} precomputed answers from {self.path}")
+    
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Precomputed analysis for a query, or None
+        """
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            self.load()
+        
+        mapping = self._mapping
+        span = self._index.get(normalize_query(query))
+        if mapping is None or span is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(mapping[span[0]:span[1]].decode("utf-8"))
+    
+    def __len__(self):
+        return len(self._index)
@@ -0,0 +1,234 @@
+import asyncio
+import cProfile
+import importlib
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .request_stages import stage_tracker
+
+# Function on an allocation traceback -> request stage, innermost match wins; mirrors the stage() call sites
+ALLOCATION_STAGES = {
+    "services.openai_service:OpenAIService._complete": "upstream",
+    "services.openai_service:OpenAIService.analyze_query": "prompt_build",
+    "services.card_selector:CardSelector._extract_key_information": "screen_extraction",
+    "services.card_selector:CardSelector._generate_card_data": "card_generation",
+    "services.card_selector:CardSelector._precomputed_analysis": "local_analysis",
+    "services.card_selector:CardSelector._local_analysis": "local_analysis",
+}
+
+UNTAGGED = "untagged"
+UPSTREAM_WAIT = "upstream_wait"
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class WorkerProfiler:
+    """
+    Profiles this worker for a few seconds on demand. "sample" reads every thread's stack from a
+    background thread at a fixed interval and tags each sample with the thread's request stage;
+    "cprofile" is the fallback where stack sampling is unavailable and only sees the event loop
+    thread. Allocation sites come from tracemalloc. One profile at a time, with capped duration,
+    stack depth and distinct stacks, so the overhead is bounded.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, interval: float = 0.01, max_depth: int = 64,
+                 max_stacks: int = 20000, allocation_frames: int = 16):
+        self.max_seconds = max_seconds
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.allocation_frames = allocation_frames
+        self._lock = threading.Lock()
+        self._labels: Dict[Any, str] = {}
+        self._stage_ranges: Optional[List[Tuple[str, int, int, str]]] = None
+
+    @staticmethod
+    def default_mode() -> str:
+        return "sample" if hasattr(sys, "_current_frames") else "cprofile"
+
+    async def profile(self, seconds: float, mode: Optional[str] = None, allocations: bool = True,
+                      top_allocations: int = 25) -> Dict[str, Any]:
+        """
+        Profile for seconds (capped at max_seconds). Returns the collapsed stacks (flamegraph.pl /
+        speedscope input), samples per stage and, with allocations, the top allocation sites.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            seconds = max(0.1, min(seconds, self.max_seconds))
+            mode = mode or self.default_mode()
+            started_tracemalloc = allocations and not tracemalloc.is_tracing()
+            if started_tracemalloc:
+                tracemalloc.start(self.allocation_frames)
+            stage_tracker.reset()
+            stage_tracker.active = True
+            try:
+                if mode == "sample":
+                    stacks, samples = await asyncio.to_thread(self._sample, seconds, threading.get_ident())
+                else:
+                    stacks, samples = await self._cprofile(seconds)
+                snapshot = tracemalloc.take_snapshot() if allocations and tracemalloc.is_tracing() else None
+            finally:
+                stage_tracker.active = False
+                stage_tracker.reset()
+                if started_tracemalloc:
+                    tracemalloc.stop()
+
+            stages = Counter()
+            for (tag, _), count in stacks.items():
+                stages[tag] += count
+            return {
+                "worker": os.getpid(),
+                "mode": mode,
+                "seconds": seconds,
+                # Stack counts are samples, or microseconds of own time with cProfile
+                "unit": "samples" if mode == "sample" else "microseconds",
+                "samples": samples,
+                "interval_ms": self.interval * 1000 if mode == "sample" else None,
+                "stages": dict(stages.most_common()),
+                "collapsed": self._collapsed(stacks),
+                "allocations": self._top_allocations(snapshot, top_allocations) if snapshot else [],
+            }
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, loop_thread_id: int) -> Tuple[Counter, int]:
+        stacks: Counter = Counter()
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + seconds
+        samples = 0
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                tag = stage_tracker.thread_stages.get(thread_id)
+                if tag is None and thread_id == loop_thread_id and stage_tracker.waiting:
+                    # The loop is idle or serving others while upstream calls are in flight
+                    tag = UPSTREAM_WAIT
+                key = (tag or UNTAGGED, (names.get(thread_id, str(thread_id)),) + self._stack(frame))
+                if key in stacks or len(stacks) < self.max_stacks:
+                    stacks[key] += 1
+                else:
+                    stacks[(key[0], ("[truncated]",))] += 1
+            del frames
+            samples += 1
+            time.sleep(self.interval)
+        return stacks, samples
+
+    def _stack(self, frame) -> Tuple[str, ...]:
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            if len(self._labels) < 50000:
+                self._labels[code] = label
+        return label
+
+    async def _cprofile(self, seconds: float) -> Tuple[Counter, int]:
+        """
+        Deterministic profile of the event loop thread. Stacks are rebuilt along each function's
+        heaviest caller, so the collapsed output is an approximation of the call tree.
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+        stats = pstats.Stats(profiler).stats
+        stacks: Counter = Counter()
+        calls = 0
+        for function, (_, primitive_calls, total_time, _, _) in stats.items():
+            calls += primitive_calls
+            weight = int(total_time * 1e6)
+            if not weight:
+                continue
+            path = [self._function_label(function)]
+            seen = {function}
+            caller = function
+            while len(path) < self.max_depth:
+                parents = stats[caller][4] if caller in stats else {}
+                parents = [parent for parent in parents if parent not in seen]
+                if not parents:
+                    break
+                caller = max(parents, key=lambda parent: stats[caller][4][parent][3])
+                seen.add(caller)
+                path.append(self._function_label(caller))
+            path.reverse()
+            stacks[(UNTAGGED, tuple(path))] += weight
+        return stacks, calls
+
+    @staticmethod
+    def _function_label(function) -> str:
+        filename, line, name = function
+        return f"{name} ({os.path.basename(filename)}:{line})" if line else name
+
+    @staticmethod
+    def _collapsed(stacks: Counter) -> str:
+        # The stage is the root frame so each stage is its own tower in the flamegraph
+        lines = [
+            ";".join((f"stage:{tag}",) + stack) + f" {count}"
+            for (tag, stack), count in stacks.most_common()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _top_allocations(self, snapshot, limit: int) -> List[Dict[str, Any]]:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        allocations = []
+        for statistic in snapshot.statistics("traceback")[:limit]:
+            frames = list(statistic.traceback)
+            allocations.append({
+                "site": f"{frames[-1].filename}:{frames[-1].lineno}" if frames else "?",
+                "stage": self._allocation_stage(frames),
+                "size_kb": round(statistic.size / 1024, 1),
+                "count": statistic.count,
+            })
+        return allocations
+
+    def _allocation_stage(self, frames) -> str:
+        # tracemalloc tracebacks are oldest first
+        for frame in reversed(frames):
+            for filename, first_line, last_line, stage in self._allocation_stage_ranges():
+                if frame.lineno >= first_line and frame.lineno <= last_line and frame.filename == filename:
+                    return stage
+        return UNTAGGED
+
+    def _allocation_stage_ranges(self) -> List[Tuple[str, int, int, str]]:
+        """
+        Source line range of each ALLOCATION_STAGES function, since tracemalloc frames carry no names
+        """
+        if self._stage_ranges is None:
+            ranges = []
+            for path, stage in ALLOCATION_STAGES.items():
+                module_name, attributes = path.split(":")
+                function = importlib.import_module(module_name)
+                for attribute in attributes.split("."):
+                    function = getattr(function, attribute)
+                code = function.__code__
+                last_line = max(line for _, _, line in code.co_lines() if line)
+                ranges.append((code.co_filename, code.co_firstlineno, last_line, stage))
+            self._stage_ranges = ranges
+        return self._stage_ranges
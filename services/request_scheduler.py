@@ -0,0 +1,188 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, lane: str, stage: str):
+        super().__init__(f"{lane} request deadline exceeded while {stage}")
+        self.lane = lane
+        self.stage = stage
+
+
+class _Waiter:
+    __slots__ = ("future", "deadline", "enqueued")
+
+    def __init__(self, future: asyncio.Future, deadline: float):
+        self.future = future
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+
+
+class Lane:
+    """
+    One request class: its share of upstream capacity (weight), its deadline in seconds and
+    whether expired requests are dropped (error) or answered with a fallback by the caller
+    """
+
+    def __init__(self, name: str, weight: float, deadline: float, drop_expired: bool):
+        self.name = name
+        self.weight = weight
+        self.deadline = deadline
+        self.drop_expired = drop_expired
+        self.queue: Deque[_Waiter] = deque()
+        self.virtual_time = 0.0
+        self.in_flight = 0
+        self.submitted = 0
+        self.served = 0
+        self.expired_in_queue = 0
+        self.expired_running = 0
+        self.failed = 0
+        self._waits_ms: Deque[float] = deque(maxlen=1024)
+        self._run_ms: Deque[float] = deque(maxlen=1024)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "weight": self.weight,
+            "deadline_ms": self.deadline * 1000,
+            "queued": len(self.queue),
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "served": self.served,
+            "expired_in_queue": self.expired_in_queue,
+            "expired_running": self.expired_running,
+            "failed": self.failed,
+            "queue_wait_ms": _percentiles(self._waits_ms),
+            "run_ms": _percentiles(self._run_ms),
+        }
+
+
+def _percentiles(samples) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+    }
+
+
+class RequestScheduler:
+    """
+    Admits at most `concurrency` upstream analyses at a time. Waiting requests queue per lane and
+    free slots go to lanes in weighted-fair order (lowest virtual time first), so a busy background
+    lane only gets its weight's share while interactive requests are waiting. Every request has a
+    deadline; it is not started once the deadline has passed and is cancelled if it runs past it.
+    """
+
+    def __init__(self, concurrency: int, lanes: List[Lane]):
+        self.concurrency = max(1, concurrency)
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self.in_flight = 0
+        self._virtual_clock = 0.0
+
+    def deadline(self, lane: str) -> float:
+        """
+        Absolute (monotonic) deadline for a request of this lane arriving now
+        """
+        return time.monotonic() + self.lanes[lane].deadline
+
+    async def run(self, lane_name: str, deadline: float, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Wait for a slot in lane_name, then await call() within the deadline.
+        Raises DeadlineExceeded if the deadline passes while queued or running.
+        """
+        lane = self.lanes[lane_name]
+        lane.submitted += 1
+        await self._acquire(lane, deadline)
+        lane.in_flight += 1
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(call(), deadline - start)
+            lane.served += 1
+            return result
+        except asyncio.TimeoutError:
+            lane.expired_running += 1
+            raise DeadlineExceeded(lane.name, "running") from None
+        except Exception:
+            lane.failed += 1
+            raise
+        finally:
+            lane._run_ms.append((time.monotonic() - start) * 1000)
+            lane.in_flight -= 1
+            self._release()
+
+    async def _acquire(self, lane: Lane, deadline: float):
+        now = time.monotonic()
+        if now >= deadline:
+            lane.expired_in_queue += 1
+            raise DeadlineExceeded(lane.name, "queued")
+        if self.in_flight < self.concurrency and not any(other.queue for other in self.lanes.values()):
+            self.in_flight += 1
+            self._advance(lane)
+            lane._waits_ms.append(0.0)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), deadline)
+        if not lane.queue:
+            # A lane returning from idle must not bank credit for the time it had nothing queued
+            lane.virtual_time = max(lane.virtual_time, self._virtual_clock)
+        lane.queue.append(waiter)
+        # Entries that gave up may be holding the queue non-empty while slots are free
+        self._dispatch()
+        try:
+            await asyncio.wait({waiter.future}, timeout=deadline - now)
+        except asyncio.CancelledError:
+            if waiter.future.done() and waiter.future.result():
+                self._release()
+            else:
+                waiter.future.cancel()
+            raise
+
+        if waiter.future.done() and waiter.future.result():
+            lane._waits_ms.append((time.monotonic() - waiter.enqueued) * 1000)
+            return
+        waiter.future.cancel()
+        lane.expired_in_queue += 1
+        raise DeadlineExceeded(lane.name, "queued")
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while self.in_flight < self.concurrency:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            waiter = lane.queue.popleft()
+            if waiter.future.done():
+                # Gave up (deadline or cancellation) while queued
+                continue
+            if waiter.deadline <= now:
+                # Expired in the queue: wake it to fail rather than spend a slot on it
+                waiter.future.set_result(False)
+                continue
+            self.in_flight += 1
+            self._advance(lane)
+            waiter.future.set_result(True)
+
+    def _next_lane(self) -> Optional[Lane]:
+        candidates = [lane for lane in self.lanes.values() if lane.queue]
+        return min(candidates, key=lambda lane: lane.virtual_time) if candidates else None
+
+    def _advance(self, lane: Lane):
+        self._virtual_clock = max(self._virtual_clock, lane.virtual_time)
+        lane.virtual_time = max(lane.virtual_time, self._virtual_clock) + 1.0 / lane.weight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
@@ -0,0 +1,79 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+# Stage durations of the current request when something (traffic capture, replay) is collecting them
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+
+class StageTracker:
+    """
+    Which stage each thread is running, for tagging profiler samples. Only maintained while active.
+    Waiting stages (an awaited upstream call) don't occupy a thread, so they are counted instead.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.thread_stages: Dict[int, str] = {}
+        self.waiting = 0
+
+    def enter(self, name: str, waiting: bool) -> Tuple[Optional[int], Optional[str]]:
+        if waiting:
+            self.waiting += 1
+            return None, None
+        thread_id = threading.get_ident()
+        previous = self.thread_stages.get(thread_id)
+        self.thread_stages[thread_id] = name
+        return thread_id, previous
+
+    def exit(self, token: Tuple[Optional[int], Optional[str]]):
+        thread_id, previous = token
+        if thread_id is None:
+            self.waiting = max(0, self.waiting - 1)
+        elif previous is None:
+            self.thread_stages.pop(thread_id, None)
+        else:
+            self.thread_stages[thread_id] = previous
+
+    def reset(self):
+        self.thread_stages.clear()
+        self.waiting = 0
+
+
+stage_tracker = StageTracker()
+
+
+@contextmanager
+def stage(name: str, waiting: bool = False):
+    """
+    Mark a request stage. Its duration (milliseconds, summed over repeats) is recorded when timings
+    are being collected, and profiler samples are tagged with it while profiling. Use waiting=True
+    for stages that await rather than compute. Costs one context variable lookup otherwise.
+    """
+    timings = _current_timings.get()
+    token = stage_tracker.enter(name, waiting) if stage_tracker.active else None
+    if timings is None and token is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if token is not None:
+            stage_tracker.exit(token)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+@contextmanager
+def collecting_timings(timings: Dict[str, float]):
+    """
+    Record stage durations of the enclosed code into timings
+    """
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
@@ -1,15 +1,61 @@
 import json
-from typing import List, Dict, Any, Optional
+import re
+import sys
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from config import Config
+from .screen_ranker import ScreenTextRanker, get_default_ranker
+
+# Upper bound on memoized chrome resourceId matches before they are reset
+_CHROME_CACHE_LIMIT = 4096
+
+# (left, top, right, bottom) from a node's bounds dict
+_BOUNDS = itemgetter('left', 'top', 'right', 'bottom')
+
+class ScreenTextItem:
+    """
+    Compact record for one piece of text extracted from the screen hierarchy
+    """
+    __slots__ = ('text', 'depth', 'type', 'class_name', 'resource_id', 'clickable', 'bounds', 'priority')
+    
+    def __init__(self, text: str, depth: int, type: str, class_name: str,
+                 resource_id: str, clickable: bool, bounds: Optional[Tuple[int, int, int, int]] = None,
+                 priority: float = 0.0):
+        self.text = text
+        self.depth = depth
+        self.type = type
+        self.class_name = class_name
+        self.resource_id = resource_id
+        self.clickable = clickable
+        self.bounds = bounds
+        self.priority = priority
+    
+    def __repr__(self):
+        return f"ScreenTextItem(text={self.text!r}, type={self.type!r}, priority={self.priority})"
 
 class ScreenContentProcessor:
     """
     Processor to extract meaningful text content from screen hierarchy data
     """
     
-    def __init__(self):
-        pass
+    def __init__(self, ranker: Optional[ScreenTextRanker] = None,
+                 chrome_resource_patterns: Optional[List[str]] = None,
+                 prune_offscreen: Optional[bool] = None):
+        self.ranker = ranker or get_default_ranker()
+        self.prune_offscreen = Config.SCREEN_PRUNE_OFFSCREEN if prune_offscreen is None else prune_offscreen
+        
+        if chrome_resource_patterns is None:
+            chrome_resource_patterns = Config.SCREEN_CHROME_RESOURCE_ID_PATTERNS
+        self._chrome_pattern = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in chrome_resource_patterns))
+            if chrome_resource_patterns else None
+        )
+        # resourceIds repeat across nodes and requests, so each is matched against the pattern once
+        self._chrome_ids: Set[str] = set()
+        self._plain_ids: Set[str] = set()
     
-    def extract_text_content(self, screen_content: str) -> List[Dict[str, Any]]:
+    def extract_text_content(self, screen_content: str) -> List[ScreenTextItem]:
         """
         Extract all meaningful text content from screen hierarchy
         
@@ -17,113 +63,191 @@ class ScreenContentProcessor:
             screen_content: JSON string containing screen hierarchy data
             
         Returns:
-            List of extracted text items with metadata
+            List of extracted text items, highest priority first
         """
         try:
             screen_data = json.loads(screen_content)
             hierarchy = screen_data.get("hierarchy", {})
+            viewport = self._get_viewport(screen_data)
             
             extracted_texts = []
-            self._traverse_hierarchy(hierarchy, extracted_texts, depth=0)
+            self._traverse_hierarchy(hierarchy, extracted_texts, depth=0, viewport=viewport)
             
             # Filter and prioritize meaningful content
-            return self._filter_meaningful_content(extracted_texts)
+            return self._filter_meaningful_content(extracted_texts, viewport)
             
         except (json.JSONDecodeError, Exception) as e:
             print(f"Error processing screen content: {e}")
             return []
     
-    def _traverse_hierarchy(self, node: Dict[str, Any], texts: List[Dict[str, Any]], depth: int = 0):
+    def _get_viewport(self, screen_data: Dict[str, Any]) -> Optional[Tuple[int, int]]:
         """
-        Recursively traverse the UI hierarchy to extract text content
+        Screen (width, height) from deviceInfo, if present
         """
-        if not isinstance(node, dict):
-            return
-            
-        # Extract text from current node attributes
-        if 'attributes' in node:
-            attrs = node['attributes']
-            
-            # Extract main text content
-            text_content = attrs.get('text', '').strip()
-            if text_content and len(text_content) > 1:
-                texts.append({
-                    'text': text_content,
-                    'depth': depth,
-                    'type': 'text',
-                    'className': attrs.get('className', ''),
-                    'resourceId': attrs.get('resourceId', ''),
-                    'contentDescription': attrs.get('contentDescription', ''),
-                    'clickable': attrs.get('clickable', False)
-                })
-            
-            # Extract content description if meaningful
-            content_desc = attrs.get('contentDescription', '').strip()
-            if content_desc and len(content_desc) > 2 and content_desc != text_content:
-                texts.append({
-                    'text': content_desc,
-                    'depth': depth,
-                    'type': 'description',
-                    'className': attrs.get('className', ''),
-                    'resourceId': attrs.get('resourceId', ''),
-                    'contentDescription': content_desc,
-                    'clickable': attrs.get('clickable', False)
-                })
-        
-        # Recurse through children
-        if 'children' in node and isinstance(node['children'], list):
-            for child in node['children']:
-                self._traverse_hierarchy(child, texts, depth + 1)
+        device_info = screen_data.get("deviceInfo")
+        if not isinstance(device_info, dict):
+            return None
+        width, height = device_info.get("width"), device_info.get("height")
+        if not width or not height:
+            return None
+        return (width, height)
     
-    def _filter_meaningful_content(self, texts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _traverse_hierarchy(self, node: Dict[str, Any], texts: List[ScreenTextItem], depth: int = 0,
+                            viewport: Optional[Tuple[int, int]] = None):
         """
-        Filter and prioritize meaningful text content
+        Traverse the UI hierarchy depth-first, in document order, to extract text content.
+        This runs on every node of every request, so it walks a stack of child iterators instead of
+        recursing, with the per-node checks inlined and bounds only read where they can change the result.
         """
-        if not texts:
-            return []
-        
-        # Remove duplicates and filter meaningless content
-        seen_texts = set()
-        filtered_texts = []
+        prune_offscreen = self.prune_offscreen
+        # Offscreen subtrees can only be cut with a viewport; without one only zero-size text is dropped
+        clip = prune_offscreen and bool(viewport)
+        width, height = viewport or (0, 0)
+        check_chrome = self._chrome_pattern is not None
+        plain_ids = self._plain_ids
+        is_chrome = self._is_chrome
+        append = texts.append
+        intern = sys.intern
+        # Texts already extracted, seeded with placeholders that carry no meaning; the first occurrence wins
+        seen = {'null', 'undefined'}
+        seen.update(item.text for item in texts)
         
-        for item in texts:
-            text = item['text']
-            
-            # Skip if already seen or meaningless
-            if (text in seen_texts or 
-                len(text) < 2 or 
-                text.isspace() or
-                text in ['', 'null', 'undefined']):
-                continue
+        # The depth of a node is its parent's stack height
+        depth -= 1
+        stack = [iter((node,))]
+        push = stack.append
+        while stack:
+            for node in stack[-1]:
+                if node.__class__ is not dict:
+                    continue
                 
-            seen_texts.add(text)
-            filtered_texts.append(item)
-        
-        # Sort by priority: deeper elements often contain more specific content
-        # Also prioritize clickable elements and certain UI components
-        def priority_score(item):
-            score = 0
-            
-            # Prefer deeper elements (more specific content)
-            score += item['depth'] * 2
-            
-            # Prefer clickable elements
-            if item['clickable']:
-                score += 10
+                children = node.get('children')
+                if children.__class__ is not list or not children:
+                    children = None
                 
-            # Prefer TextView and Button elements
-            if 'TextView' in item['className'] or 'Button' in item['className']:
-                score += 5
+                # Attributes and their values may be null in the hierarchy JSON
+                attrs = node.get('attributes')
+                shows_text = False
+                if attrs:
+                    text_content = attrs.get('text')
+                    content_desc = attrs.get('contentDescription')
+                    # Most nodes are layout containers without text of their own
+                    if text_content or content_desc:
+                        text_content = text_content.strip() if text_content else ''
+                        content_desc = content_desc.strip() if content_desc else ''
+                        has_text = len(text_content) > 1 and text_content not in seen
+                        has_desc = len(content_desc) > 2 and content_desc != text_content and content_desc not in seen
+                        shows_text = has_text or has_desc
+                    
+                    if not shows_text and not children:
+                        # A leaf without text has nothing to show or prune
+                        continue
+                    
+                    # Skip system chrome such as status and navigation bars, including their children
+                    resource_id = attrs.get('resourceId')
+                    if resource_id and check_chrome and resource_id not in plain_ids and is_chrome(resource_id):
+                        continue
+                elif not children:
+                    continue
                 
-            # Prefer longer text content
-            score += min(len(item['text']), 20)
-            
-            return score
-        
-        filtered_texts.sort(key=priority_score, reverse=True)
+                # Bounds only matter for text of this node or, with a viewport, for cutting its subtree
+                if shows_text or clip and children:
+                    try:
+                        left, top, right, bottom = bounds = _BOUNDS(node['bounds'])
+                        has_area = right > left and bottom > top
+                    except (KeyError, TypeError):
+                        # Missing, null, incomplete or non-numeric bounds count as unknown
+                        bounds = None
+                    else:
+                        if prune_offscreen:
+                            # A zero-size node on the viewport edge, such as a (0, 0, 0, 0) container, is inside
+                            if clip and (
+                                right <= 0 or bottom <= 0 or left >= width or top >= height if has_area
+                                else right < 0 or bottom < 0 or left > width or top > height
+                            ):
+                                continue
+                            # Zero-size containers still lay out visible children, so only their own text is dropped
+                            shows_text = shows_text and has_area
+                
+                if shows_text:
+                    # Class names repeat across thousands of nodes, so share one string per class
+                    class_name = intern(attrs.get('className') or '')
+                    clickable = attrs.get('clickable', False)
+                    resource_id = resource_id or ''
+                    node_depth = depth + len(stack)
+                    
+                    # Extract main text content
+                    if has_text:
+                        seen.add(text_content)
+                        append(ScreenTextItem(text_content, node_depth, 'text', class_name, resource_id,
+                                              clickable, bounds))
+                    
+                    # Extract content description if meaningful
+                    if has_desc:
+                        seen.add(content_desc)
+                        append(ScreenTextItem(content_desc, node_depth, 'description', class_name,
+                                              resource_id, clickable, bounds))
+                
+                # Descend into the children; this node's remaining siblings resume once they are done
+                if children:
+                    push(iter(children))
+                    break
+            else:
+                stack.pop()
+    
+    def _is_chrome(self, resource_id: Any) -> bool:
+        """
+        True when a resourceId matches the combined chrome pattern. Non-string ids never match.
+        """
+        if resource_id.__class__ is not str:
+            return False
+        if resource_id in self._chrome_ids:
+            return True
+        if resource_id in self._plain_ids:
+            return False
+        if len(self._chrome_ids) + len(self._plain_ids) >= _CHROME_CACHE_LIMIT:
+            self._chrome_ids.clear()
+            self._plain_ids.clear()
+        if self._chrome_pattern.search(resource_id):
+            self._chrome_ids.add(resource_id)
+            return True
+        self._plain_ids.add(resource_id)
+        return False
+    
+    def _has_area(self, bounds: Tuple[int, int, int, int]) -> bool:
+        left, top, right, bottom = bounds
+        return right > left and bottom > top
+    
+    def _is_offscreen(self, bounds: Tuple[int, int, int, int], viewport: Optional[Tuple[int, int]]) -> bool:
+        """
+        True for nodes lying entirely outside the viewport. A zero-size node on the viewport edge,
+        such as a (0, 0, 0, 0) container, still counts as inside.
+        """
+        if not viewport:
+            return False
+        left, top, right, bottom = bounds
+        width, height = viewport
+        if not self._has_area(bounds):
+            return right < 0 or bottom < 0 or left > width or top > height
+        return right <= 0 or bottom <= 0 or left >= width or top >= height
+    
+    def _filter_meaningful_content(self, texts: List[ScreenTextItem],
+                                   viewport: Optional[Tuple[int, int]] = None) -> List[ScreenTextItem]:
+        """
+        Prioritize the extracted text content; the traversal already dropped duplicates and placeholders
+        """
+        if not texts:
+            return []
         
-        # Return top content items
-        return filtered_texts[:20]  # Limit to top 20 items to avoid overwhelming
+        # Score the items in one batch and keep the best, ties in document order
+        scores = self.ranker.scores(texts, viewport)
+        order = sorted(range(len(texts)), key=scores.__getitem__, reverse=True)
+        top_texts = []
+        for index in order[:self.ranker.max_items]:  # Limit to avoid overwhelming the prompt
+            item = texts[index]
+            item.priority = scores[index]
+            top_texts.append(item)
+        return top_texts
     
     def get_context_summary(self, screen_content: str) -> str:
         """
@@ -135,14 +259,14 @@ class ScreenContentProcessor:
             return "No meaningful text content found in screen."
         
         # Create a concise summary of the most relevant content
-        top_texts = texts[:10]  # Use top 10 most relevant texts
+        top_texts = texts[:self.ranker.summary_items]  # Use only the most relevant texts
         
         summary_parts = []
         for item in top_texts:
-            context = f"Text: '{item['text']}"
-            if item['className']:
-                context += f" (Type: {item['className'].split('.')[-1]})"
-            if item['clickable']:
+            context = f"Text: '{item.text}"
+            if item.class_name:
+                context += f" (Type: {item.class_name.split('.')[-1]})"
+            if item.clickable:
                 context += " [Clickable]"
             context += "'"
             summary_parts.append(context)
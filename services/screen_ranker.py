@@ -0,0 +1,210 @@
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+# Characters in the CJK Unified Ideographs block
+_CJK_PATTERN = re.compile('[\u4e00-\u9fff]')
+_RESOURCE_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+Viewport = Optional[Tuple[int, int]]
+
+# Upper bound on per-class / per-resourceId memo entries before they are reset
+_CACHE_LIMIT = 4096
+
+# Defaults reproduce the original hard-coded priority_score
+DEFAULT_RANKING_CONFIG: Dict[str, Any] = {
+    "bias": 0.0,
+    "weights": {
+        "depth": 2.0,
+        "clickable": 10.0,
+        "text_view_or_button": 5.0,
+        "text_length": 1.0,
+    },
+    "resource_id_tokens": {},
+    "text_length_cap": 20,
+    "max_items": 20,
+    "summary_items": 10,
+}
+
+
+def _text_view_or_button(ranker: "ScreenTextRanker", item, viewport: Viewport) -> float:
+    flag = ranker._class_flags.get(item.class_name)
+    if flag is None:
+        flag = 1.0 if 'TextView' in item.class_name or 'Button' in item.class_name else 0.0
+        if len(ranker._class_flags) >= _CACHE_LIMIT:
+            ranker._class_flags.clear()
+        ranker._class_flags[item.class_name] = flag
+    return flag
+
+
+def _area_ratio(ranker: "ScreenTextRanker", item, viewport: Viewport) -> float:
+    if not item.bounds or not viewport:
+        return 0.0
+    left, top, right, bottom = item.bounds
+    area = max(right - left, 0) * max(bottom - top, 0)
+    return min(area / float(viewport[0] * viewport[1]), 1.0)
+
+
+def _center_y(ranker: "ScreenTextRanker", item, viewport: Viewport) -> float:
+    if not item.bounds or not viewport:
+        return 0.5
+    top, bottom = item.bounds[1], item.bounds[3]
+    return min(max((top + bottom) / 2.0 / viewport[1], 0.0), 1.0)
+
+
+def _center_x(ranker: "ScreenTextRanker", item, viewport: Viewport) -> float:
+    if not item.bounds or not viewport:
+        return 0.5
+    left, right = item.bounds[0], item.bounds[2]
+    return min(max((left + right) / 2.0 / viewport[0], 0.0), 1.0)
+
+
+def _cjk_ratio(ranker: "ScreenTextRanker", item, viewport: Viewport) -> float:
+    return len(_CJK_PATTERN.findall(item.text)) / len(item.text)
+
+
+# Cheap per-item features; the order here is the order used by feature_vector()
+FEATURES: Dict[str, Callable[["ScreenTextRanker", Any, Viewport], float]] = {
+    "depth": lambda ranker, item, viewport: float(item.depth),
+    "clickable": lambda ranker, item, viewport: 1.0 if item.clickable else 0.0,
+    "text_view_or_button": _text_view_or_button,
+    "edit_text": lambda ranker, item, viewport: 1.0 if 'EditText' in item.class_name else 0.0,
+    "is_description": lambda ranker, item, viewport: 1.0 if item.type == 'description' else 0.0,
+    "text_length": lambda ranker, item, viewport: float(min(len(item.text), ranker.text_length_cap)),
+    "area_ratio": _area_ratio,
+    "center_x": _center_x,
+    "center_y": _center_y,
+    "cjk_ratio": _cjk_ratio,
+}
+
+FEATURE_NAMES: List[str] = list(FEATURES)
+
+# The default linear features, computed inline by score(); other weighted features go through FEATURES
+_INLINE_FEATURES = ("depth", "clickable", "text_view_or_button", "text_length")
+
+
+def resource_id_tokens(resource_id: str) -> List[str]:
+    """
+    Split a resourceId such as "com.app:id/chat_title" into tokens ["chat", "title"]
+    """
+    if not resource_id:
+        return []
+    name = resource_id.rsplit('/', 1)[-1].lower()
+    return _RESOURCE_TOKEN_PATTERN.findall(name)
+
+
+class ScreenTextRanker:
+    """
+    Linear ranking model for extracted screen text, with weights loaded from a config file
+    """
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = {**DEFAULT_RANKING_CONFIG, **(config or {})}
+        
+        unknown = set(config["weights"]) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown ranking features: {sorted(unknown)}")
+        
+        self.config = config
+        self.bias = float(config["bias"])
+        self.weights = {name: float(weight) for name, weight in config["weights"].items()}
+        self.resource_id_weights = {token.lower(): float(weight) for token, weight in config["resource_id_tokens"].items()}
+        self.text_length_cap = int(config["text_length_cap"])
+        self.max_items = int(config["max_items"])
+        self.summary_items = int(config["summary_items"])
+        
+        self._depth_weight = self.weights.get("depth", 0.0)
+        self._clickable_weight = self.weights.get("clickable", 0.0)
+        self._class_weight = self.weights.get("text_view_or_button", 0.0)
+        self._length_weight = self.weights.get("text_length", 0.0)
+        # Only call out to the remaining features that actually contribute to the score
+        self._active = [
+            (FEATURES[name], weight) for name, weight in self.weights.items()
+            if weight and name not in _INLINE_FEATURES
+        ]
+        self._class_flags: Dict[str, float] = {}
+        self._resource_scores: Dict[str, float] = {}
+    
+    @classmethod
+    def from_file(cls, path: str) -> "ScreenTextRanker":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+    
+    def score(self, item, viewport: Viewport = None) -> float:
+        """
+        Score one extracted text item; higher scores are shown to the model first
+        """
+        return self.scores((item,), viewport)[0]
+    
+    def scores(self, items, viewport: Viewport = None) -> List[float]:
+        """
+        Score a batch of items in one pass, with the weights and memos held in locals
+        """
+        bias = self.bias
+        depth_weight = self._depth_weight
+        length_weight = self._length_weight
+        text_length_cap = self.text_length_cap
+        clickable_weight = self._clickable_weight
+        class_weight = self._class_weight
+        class_flags = self._class_flags
+        active = self._active
+        resource_id_weights = self.resource_id_weights
+        resource_scores = self._resource_scores
+        
+        results = []
+        for item in items:
+            text_length = len(item.text)
+            if text_length > text_length_cap:
+                text_length = text_length_cap
+            score = bias + depth_weight * item.depth + length_weight * text_length
+            if item.clickable:
+                score += clickable_weight
+            if class_weight:
+                flag = class_flags.get(item.class_name)
+                if flag is None:
+                    flag = _text_view_or_button(self, item, viewport)
+                score += class_weight * flag
+            if active:
+                for feature, weight in active:
+                    score += weight * feature(self, item, viewport)
+            
+            if resource_id_weights and item.resource_id:
+                resource_score = resource_scores.get(item.resource_id)
+                if resource_score is None:
+                    resource_score = sum(
+                        resource_id_weights.get(token, 0.0) for token in resource_id_tokens(item.resource_id)
+                    )
+                    if len(resource_scores) >= _CACHE_LIMIT:
+                        resource_scores.clear()
+                    resource_scores[item.resource_id] = resource_score
+                score += resource_score
+            
+            results.append(score)
+        return results
+    
+    def feature_vector(self, item, viewport: Viewport = None) -> List[float]:
+        """
+        All features for an item in FEATURE_NAMES order, used by the offline fitting tool
+        """
+        return [FEATURES[name](self, item, viewport) for name in FEATURE_NAMES]
+
+
+_default_ranker: Optional[ScreenTextRanker] = None
+
+def get_default_ranker() -> ScreenTextRanker:
+    """
+    Return the ranker configured by SCREEN_RANKING_CONFIG, loading it once per process
+    """
+    global _default_ranker
+    if _default_ranker is None:
+        path = Config.SCREEN_RANKING_CONFIG
+        if path and os.path.exists(path):
+            _default_ranker = ScreenTextRanker.from_file(path)
+        else:
+            if path:
+                print(f"Screen ranking config not found at {path}, using built-in weights")
+            _default_ranker = ScreenTextRanker()
+    return _default_ranker
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from config import Config
+
+# One remembered turn: (card_name, resolved entity)
+SessionTurn = Tuple[str, str]
+
+
+class SessionStore(ABC):
+    """
+    Keeps the last few resolved entities and card choices per client session
+    """
+    
+    def __init__(self, max_turns: int = 3, ttl_seconds: float = 1800):
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+    
+    @abstractmethod
+    async def get(self, session_id: str) -> List[SessionTurn]:
+        """
+        Remembered turns of a session, oldest first; empty when unknown or expired
+        """
+    
+    @abstractmethod
+    async def record(self, session_id: str, card_name: str, entity: str):
+        """
+        Remember a turn, keeping at most max_turns per session
+        """
+    
+    def _append(self, turns: List[SessionTurn], card_name: str, entity: str) -> List[SessionTurn]:
+        # Drop an older copy of the same turn so repeats don't crowd out history
+        turns = [turn for turn in turns if turn != (card_name, entity)]
+        turns.append((card_name, entity))
+        return turns[-self.max_turns:]
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    LRU of sessions with a size cap and TTL, local to one worker process
+    """
+    
+    def __init__(self, max_sessions: int = 10000, max_turns: int = 3, ttl_seconds: float = 1800):
+        super().__init__(max_turns, ttl_seconds)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Tuple[float, List[SessionTurn]]]" = OrderedDict()
+    
+    async def get(self, session_id: str) -> List[SessionTurn]:
+        return self._get(session_id)
+    
+    async def record(self, session_id: str, card_name: str, entity: str):
+        turns = self._append(self._get(session_id), card_name, entity)
+        self._sessions[session_id] = (time.monotonic() + self.ttl_seconds, turns)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+    
+    def _get(self, session_id: str) -> List[SessionTurn]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return []
+        expires_at, turns = entry
+        if expires_at < time.monotonic():
+            del self._sessions[session_id]
+            return []
+        self._sessions.move_to_end(session_id)
+        return list(turns)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a local SQLite file, shared by workers on the same host.
+    Queries run in a worker thread; expired and excess sessions are pruned every prune_interval seconds.
+    """
+    
+    def __init__(self, path: str, max_sessions: int = 10000, max_turns: int = 3, ttl_seconds: float = 1800,
+                 prune_interval: float = 60.0):
+        super().__init__(max_turns, ttl_seconds)
+        self.max_sessions = max_sessions
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, turns TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions(updated_at)")
+    
+    async def get(self, session_id: str) -> List[SessionTurn]:
+        return await asyncio.to_thread(self._get, session_id)
+    
+    async def record(self, session_id: str, card_name: str, entity: str):
+        await asyncio.to_thread(self._record, session_id, card_name, entity)
+    
+    def _get(self, session_id: str) -> List[SessionTurn]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT turns FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return []
+        return [tuple(turn) for turn in json.loads(row[0])]
+    
+    def _record(self, session_id: str, card_name: str, entity: str):
+        turns = self._append(self._get(session_id), card_name, entity)
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, turns, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(turns, ensure_ascii=False, separators=(",", ":")), now)
+            )
+            if now - self._pruned_at >= self.prune_interval:
+                self._pruned_at = now
+                self._prune(now)
+    
+    def _prune(self, now: float):
+        """
+        Expire old sessions and enforce the size cap; both walk the updated_at index
+        """
+        self._connection.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+        self._connection.execute(
+            "DELETE FROM sessions WHERE updated_at < "
+            "(SELECT updated_at FROM sessions ORDER BY updated_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_sessions - 1,)
+        )
+
+
+def create_session_store() -> Optional[SessionStore]:
+    """
+    Build the session store selected by SESSION_STORE ("memory", "sqlite" or "none")
+    """
+    backend = Config.SESSION_STORE
+    if backend == "memory":
+        return InMemorySessionStore(Config.SESSION_MAX_SESSIONS, Config.SESSION_MAX_TURNS, Config.SESSION_TTL_SECONDS)
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            Config.SESSION_SQLITE_PATH, Config.SESSION_MAX_SESSIONS, Config.SESSION_MAX_TURNS, Config.SESSION_TTL_SECONDS
+        )
+    if backend not in ("", "none"):
+        print(f"Unknown SESSION_STORE '{backend}', session context disabled")
+    return None
+
+
+def format_session_context(turns: List[SessionTurn]) -> Optional[str]:
+    """
+    Compact context line for the prompt, most recent turn last
+    """
+    if not turns:
+        return None
+    return "Recent context: " + "; ".join(f"{card_name} '{entity}'" for card_name, entity in turns)
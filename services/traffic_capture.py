@@ -0,0 +1,307 @@
+import base64
+import glob
+import gzip
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from .request_stages import collecting_timings
+
+# Replaces e-mail addresses and long digit runs (phone, card and account numbers) when redacting
+REDACT_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+|\+?\d[\d\s\-()]{6,}\d")
+REDACTED = "<redacted>"
+
+# Request headers kept with each record; the request class picks the scheduler lane on replay
+CAPTURED_HEADERS = frozenset((b"x-brain-user-location", b"x-brain-session-id", b"x-brain-request-class"))
+
+FILE_PREFIX = "traffic-"
+FILE_SUFFIX = ".jsonl.gz"
+
+
+class TrafficCapture:
+    """
+    Everything recorded about one sampled request while it is being served
+    """
+    __slots__ = ("timings", "upstream")
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.upstream: List[Dict[str, Any]] = []
+
+
+_current_capture: ContextVar[Optional[TrafficCapture]] = ContextVar("traffic_capture", default=None)
+
+
+def record_upstream(request, content: Optional[str] = None, error: Optional[str] = None):
+    """
+    Keep an upstream completion (a CompletionRequest and its reply) for replay
+    """
+    capture = _current_capture.get()
+    if capture is not None:
+        capture.upstream.append({
+            "query": request.query,
+            "max_cards": request.max_cards,
+            "turns": len(request.messages),
+            "content": content,
+            "error": error,
+        })
+
+
+@contextmanager
+def capturing(capture: TrafficCapture):
+    """
+    Make capture the target of record_upstream() and of stage timings for the enclosed code
+    """
+    token = _current_capture.set(capture)
+    try:
+        with collecting_timings(capture.timings):
+            yield capture
+    finally:
+        _current_capture.reset(token)
+
+
+def redact(text: Optional[str]) -> Optional[str]:
+    return REDACT_PATTERN.sub(REDACTED, text) if text else text
+
+
+def redact_values(value: Any) -> Any:
+    """
+    Redact the strings inside parsed JSON; numbers are left alone so the structure stays valid
+    """
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, list):
+        return [redact_values(item) for item in value]
+    if isinstance(value, dict):
+        return {key: redact_values(item) for key, item in value.items()}
+    return value
+
+
+def redact_json_text(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return text
+    try:
+        return json.dumps(redact_values(json.loads(text)), ensure_ascii=False)
+    except json.JSONDecodeError:
+        return redact(text)
+
+
+def compress_text(text: Optional[str]) -> Optional[str]:
+    return base64.b64encode(zlib.compress(text.encode("utf-8"))).decode("ascii") if text else None
+
+
+def decompress_text(data: Optional[str]) -> Optional[str]:
+    return zlib.decompress(base64.b64decode(data)).decode("utf-8") if data else None
+
+
+class TrafficRecorder:
+    """
+    Writes sampled requests to rotating gzip-compressed JSONL files from a background thread.
+    The request path only enqueues; when the queue is full records are dropped, not waited on.
+    """
+
+    def __init__(self, directory: str, sample_rate: float, redact: bool = True,
+                 max_file_bytes: int = 64 * 1024 * 1024, max_files: int = 20, queue_size: int = 1000):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.redact = redact
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.sampled = 0
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._raw = None
+        self._file = None
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def submit(self, entry: Dict[str, Any]):
+        self.sampled += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"sampled": self.sampled, "written": self.written, "dropped": self.dropped}
+
+    def close(self):
+        """
+        Flush queued records and finish the current file so it has a valid gzip trailer
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            try:
+                self._write(self._build_record(entry))
+                self.written += 1
+            except Exception as e:
+                self.dropped += 1
+                print(f"Traffic capture error: {e}")
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+            self._file = self._raw = None
+
+    def _build_record(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            request = json.loads(entry["request_body"])
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            request = {}
+        try:
+            response = json.loads(entry["response_body"])
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            response = None
+
+        query = request.get("query")
+        screen_content = request.get("screen_content")
+        location = entry["headers"].get("x-brain-user-location")
+        session_id = entry["headers"].get("x-brain-session-id")
+        request_class = entry["headers"].get("x-brain-request-class")
+        upstream = entry["upstream"]
+        if self.redact:
+            query = redact(query)
+            screen_content = redact_json_text(screen_content)
+            location = None
+            upstream = [dict(item, query=redact(item["query"]), content=redact(item["content"])) for item in upstream]
+            response = redact_values(response)
+
+        return {
+            "ts": entry["ts"],
+            "path": entry["path"],
+            "status": entry["status"],
+            "query": query,
+            "screen_content_zlib": compress_text(screen_content),
+            "max_cards": request.get("max_cards", 1),
+            "user_location": location,
+            "session_id": session_id,
+            "request_class": request_class,
+            "redacted": self.redact,
+            "timings_ms": {name: round(ms, 3) for name, ms in entry["timings"].items()},
+            "upstream": upstream,
+            "response": response,
+        }
+
+    def _write(self, record: Dict[str, Any]):
+        if self._file is None or self._raw.tell() >= self.max_file_bytes:
+            self._rotate()
+        self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        # Sync flush so a worker killed without shutdown still leaves readable records
+        self._file.flush()
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{FILE_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}{FILE_SUFFIX}"
+        self._raw = open(os.path.join(self.directory, name), "ab")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="ab")
+
+        # Other workers write to the same directory, so files may vanish between listing and removal
+        existing = []
+        for path in glob.glob(os.path.join(self.directory, f"{FILE_PREFIX}*{FILE_SUFFIX}")):
+            try:
+                existing.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        for _, path in sorted(existing)[:-self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware that samples requests to the given paths and hands the request body, response,
+    upstream completions and stage timings to a TrafficRecorder. Unsampled requests pass straight through.
+    """
+
+    def __init__(self, app, recorder: TrafficRecorder, paths=("/initial",)):
+        self.app = app
+        self.recorder = recorder
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths or not self.recorder.should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        request_body = bytearray()
+        response_body = bytearray()
+        status = [None]
+
+        async def receive_and_keep():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b""))
+            return message
+
+        async def send_and_keep(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        capture = TrafficCapture()
+        start = time.perf_counter()
+        try:
+            with capturing(capture):
+                await self.app(scope, receive_and_keep, send_and_keep)
+        finally:
+            capture.timings["total"] = (time.perf_counter() - start) * 1000
+            self.recorder.submit({
+                "ts": time.time(),
+                "path": scope["path"],
+                "status": status[0],
+                "headers": {
+                    name.decode("latin-1").lower(): value.decode("latin-1")
+                    for name, value in scope.get("headers", [])
+                    if name.lower() in CAPTURED_HEADERS
+                },
+                "request_body": bytes(request_body),
+                "response_body": bytes(response_body),
+                "timings": capture.timings,
+                "upstream": capture.upstream,
+            })
+
+
+def read_traffic(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Records from capture files in order, with screen_content decompressed. A file whose writer
+    was killed mid-stream yields the records flushed before it stopped.
+    """
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        record["screen_content"] = decompress_text(record.pop("screen_content_zlib", None))
+                        yield record
+            except EOFError:
+                continue
@@ -0,0 +1,98 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Language name -> aliases (English and Chinese) used to spot the target language in a query
+LANGUAGE_ALIASES: Dict[str, List[str]] = {
+    "English": ["english", "英文", "英语"],
+    "Chinese": ["chinese", "mandarin", "中文", "汉语", "普通话", "华语"],
+    "Cantonese": ["cantonese", "粤语", "广东话"],
+    "Japanese": ["japanese", "日语", "日文"],
+    "Korean": ["korean", "韩语", "韩文", "朝鲜语"],
+    "French": ["french", "法语", "法文"],
+    "Spanish": ["spanish", "西班牙语", "西语"],
+    "German": ["german", "德语", "德文"],
+    "Italian": ["italian", "意大利语"],
+    "Portuguese": ["portuguese", "葡萄牙语"],
+    "Russian": ["russian", "俄语", "俄文"],
+    "Arabic": ["arabic", "阿拉伯语"],
+    "Thai": ["thai", "泰语"],
+    "Vietnamese": ["vietnamese", "越南语"],
+    "Hindi": ["hindi", "印地语"],
+}
+
+_ALIAS_TO_LANGUAGE = {alias: language for language, aliases in LANGUAGE_ALIASES.items() for alias in aliases}
+_LANGUAGE = "|".join(re.escape(alias) for alias in sorted(_ALIAS_TO_LANGUAGE, key=len, reverse=True))
+
+# Unicode script ranges -> language; checked in order, first script present wins
+_SCRIPTS: List[Tuple[str, "re.Pattern"]] = [
+    ("Japanese", re.compile('[\u3040-\u30ff]')),
+    ("Korean", re.compile('[\uac00-\ud7af\u1100-\u11ff]')),
+    ("Chinese", re.compile('[\u4e00-\u9fff]')),
+    ("Russian", re.compile('[\u0400-\u04ff]')),
+    ("Arabic", re.compile('[\u0600-\u06ff]')),
+    ("Thai", re.compile('[\u0e00-\u0e7f]')),
+    ("Hindi", re.compile('[\u0900-\u097f]')),
+]
+# Latin-script languages told apart by characters English doesn't use
+_LATIN_HINTS: List[Tuple[str, "re.Pattern"]] = [
+    ("Spanish", re.compile('[ñ¿¡]', re.IGNORECASE)),
+    ("German", re.compile('[äöüß]', re.IGNORECASE)),
+    ("French", re.compile('[çœèêëîïûù]', re.IGNORECASE)),
+    ("Portuguese", re.compile('[ãõ]', re.IGNORECASE)),
+]
+
+_QUOTES = "\"'“”‘’「」『』"
+
+# "translate X to/into French", "how do you say X in French", "把X翻译成英文", "X用日语怎么说", "X的英文"
+_PATTERNS = [
+    re.compile(rf"^\s*(?:please\s+)?translate\s+(?P<text>.+?)\s+(?:to|into|in)\s+(?P<lang>{_LANGUAGE})\s*[.?!]?\s*$", re.IGNORECASE),
+    re.compile(rf"^\s*(?:how\s+(?:do\s+(?:you|i)|to)\s+say|what\s+is)\s+(?P<text>.+?)\s+in\s+(?P<lang>{_LANGUAGE})\s*[.?!]?\s*$", re.IGNORECASE),
+    re.compile(rf"^\s*(?:请|帮我)?(?:把)?(?P<text>.+?)(?:翻译成|翻成|译成|翻译为)(?P<lang>{_LANGUAGE})\s*[。？?]?\s*$", re.IGNORECASE),
+    re.compile(rf"^\s*(?P<text>.+?)用(?P<lang>{_LANGUAGE})(?:怎么说|怎么讲|怎么写)\s*[。？?]?\s*$", re.IGNORECASE),
+    # "X的英文是什么" only with the question suffix; a bare "X的英文" is usually "X's English", not a request
+    re.compile(rf"^\s*(?P<text>.+?)的(?P<lang>{_LANGUAGE})(?:是什么|怎么说)\s*[。？?]?\s*$", re.IGNORECASE),
+]
+# "我的英文怎么说" asks about the speaker's English, never for a translation of "我"
+_PRONOUNS = frozenset(["我", "你", "您", "他", "她", "它", "我们", "你们", "他们", "她们", "这", "那", "这个", "那个"])
+
+
+def identify_language(text: str) -> str:
+    """
+    Small script-based language identifier; Latin text defaults to English
+    """
+    for language, pattern in _SCRIPTS:
+        if pattern.search(text):
+            return language
+    for language, pattern in _LATIN_HINTS:
+        if pattern.search(text):
+            return language
+    return "English"
+
+
+class TranslationParser:
+    """
+    Parses translation requests into Translation card parameters without a model call
+    """
+    
+    def parse(self, query: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Translation card parameters, or None when the query is not a translation request
+        """
+        for pattern in _PATTERNS:
+            match = pattern.match(query)
+            if not match:
+                continue
+            text = match.group("text").strip().strip(_QUOTES).strip()
+            if not text or text in _PRONOUNS:
+                continue
+            output_language = _ALIAS_TO_LANGUAGE[match.group("lang").lower()]
+            input_language = identify_language(text)
+            if input_language == output_language:
+                continue
+            return {
+                "input_text": text,
+                "input_language": input_language,
+                "output_language": output_language,
+                "output_text": None,
+            }
+        return None
@@ -0,0 +1,160 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# canonical unit -> (dimension, aliases in English and Chinese)
+UNIT_TABLE: Dict[str, Tuple[str, List[str]]] = {
+    # Currencies (ISO 4217 codes)
+    "USD": ("currency", ["usd", "us dollar", "us dollars", "dollar", "dollars", "美元", "美金"]),
+    "EUR": ("currency", ["eur", "euro", "euros", "欧元"]),
+    "CNY": ("currency", ["cny", "rmb", "yuan", "chinese yuan", "renminbi", "人民币", "块钱"]),
+    "JPY": ("currency", ["jpy", "yen", "japanese yen", "日元", "日币"]),
+    "GBP": ("currency", ["gbp", "british pound", "british pounds", "pound sterling", "sterling", "英镑"]),
+    "HKD": ("currency", ["hkd", "hong kong dollar", "hong kong dollars", "港币", "港元"]),
+    "KRW": ("currency", ["krw", "won", "korean won", "韩元", "韩币"]),
+    "CAD": ("currency", ["cad", "canadian dollar", "canadian dollars", "加元", "加币"]),
+    "AUD": ("currency", ["aud", "australian dollar", "australian dollars", "澳元", "澳币"]),
+    "SGD": ("currency", ["sgd", "singapore dollar", "singapore dollars", "新加坡元", "新币"]),
+    "TWD": ("currency", ["twd", "ntd", "taiwan dollar", "new taiwan dollar", "新台币", "台币"]),
+    "INR": ("currency", ["inr", "rupee", "rupees", "indian rupee", "卢比"]),
+    "CHF": ("currency", ["chf", "swiss franc", "swiss francs", "瑞士法郎"]),
+    # Length
+    "mm": ("length", ["mm", "millimeter", "millimeters", "millimetre", "millimetres", "毫米"]),
+    "cm": ("length", ["cm", "centimeter", "centimeters", "centimetre", "centimetres", "厘米", "公分"]),
+    "m": ("length", ["m", "meter", "meters", "metre", "metres", "米"]),
+    "km": ("length", ["km", "kilometer", "kilometers", "kilometre", "kilometres", "公里", "千米"]),
+    "in": ("length", ["inch", "inches", "英寸", "寸"]),
+    "ft": ("length", ["ft", "foot", "feet", "英尺"]),
+    "yd": ("length", ["yd", "yard", "yards", "码"]),
+    "mi": ("length", ["mi", "mile", "miles", "英里"]),
+    # Mass
+    "mg": ("mass", ["mg", "milligram", "milligrams", "毫克"]),
+    "g": ("mass", ["g", "gram", "grams", "克"]),
+    "kg": ("mass", ["kg", "kilogram", "kilograms", "kilo", "kilos", "公斤", "千克"]),
+    "lb": ("mass", ["lb", "lbs", "pound", "pounds", "磅"]),
+    "oz": ("mass", ["oz", "ounce", "ounces", "盎司"]),
+    "jin": ("mass", ["jin", "斤"]),
+    "t": ("mass", ["tonne", "tonnes", "metric ton", "吨"]),
+    # Temperature
+    "C": ("temperature", ["c", "°c", "℃", "celsius", "centigrade", "摄氏度", "摄氏"]),
+    "F": ("temperature", ["f", "°f", "℉", "fahrenheit", "华氏度", "华氏"]),
+    "K": ("temperature", ["kelvin", "开尔文"]),
+    # Volume
+    "ml": ("volume", ["ml", "milliliter", "milliliters", "millilitre", "毫升"]),
+    "L": ("volume", ["l", "liter", "liters", "litre", "litres", "升"]),
+    "gal": ("volume", ["gal", "gallon", "gallons", "加仑"]),
+    "fl oz": ("volume", ["fl oz", "fluid ounce", "fluid ounces", "液量盎司"]),
+    "cup": ("volume", ["cup", "cups", "杯"]),
+    # Area
+    "m2": ("area", ["m2", "m²", "square meter", "square meters", "sqm", "平方米", "平米"]),
+    "ft2": ("area", ["ft2", "ft²", "square foot", "square feet", "sq ft", "平方英尺"]),
+    "acre": ("area", ["acre", "acres", "英亩"]),
+    "mu": ("area", ["亩"]),
+    "ha": ("area", ["hectare", "hectares", "公顷"]),
+}
+
+# alias -> (canonical unit, dimension), built once at import
+UNIT_ALIASES: Dict[str, Tuple[str, str]] = {
+    alias: (unit, dimension) for unit, (dimension, aliases) in UNIT_TABLE.items() for alias in aliases
+}
+
+_CJK_CHAR = re.compile('[\u4e00-\u9fff]')
+
+_LATIN_ALIASES = sorted((alias for alias in UNIT_ALIASES if not _CJK_CHAR.search(alias)), key=len, reverse=True)
+_CJK_ALIASES = sorted((alias for alias in UNIT_ALIASES if _CJK_CHAR.search(alias)), key=len, reverse=True)
+
+# Longest aliases first so "fluid ounce" wins over "ounce" and "公里" over "里".
+# Latin aliases must stand alone ("m" must not match inside "me"). CJK text has no word boundaries,
+# so a CJK alias only counts as a unit where the number or cue rules below place it.
+_UNIT_PATTERN = re.compile(
+    r"(?<![a-z])(?:" + "|".join(re.escape(alias).replace(r"\ ", r"\s+") for alias in _LATIN_ALIASES) + r")(?![a-z])"
+    r"|" + "|".join(re.escape(alias) for alias in _CJK_ALIASES),
+    re.IGNORECASE
+)
+_WHITESPACE = re.compile(r"\s+")
+
+# The source unit must directly follow its number: "100 usd", "5公里", "三百五十公斤", "ten miles"
+_NUMBER_BEFORE = re.compile(
+    r"(?:(?P<arabic>-?\d+(?:,\d{3})*(?:\.\d+)?|-?\.\d+)"
+    "|(?P<chinese>[零一二两三四五六七八九十百千万亿]+)"
+    r"|\b(?P<english>one|two|three|four|five|six|seven|eight|nine|ten|hundred|thousand))\s*$",
+    re.IGNORECASE
+)
+# The target unit must directly follow a conversion cue: "to eur", "how many miles", "换成欧元", "多少磅"
+_CUE_BEFORE = re.compile(
+    r"(?:\b(?:to|into|in|convert(?:ed)?\s+to)|how\s+many|how\s+much|->|=|→"
+    r"|换成|换算成|转换成|转成|兑换成|折合|等于|多少|几)\s*$",
+    re.IGNORECASE
+)
+# A CJK target must also end the clause, so "多少米" in "多少米饭" is not a unit
+_CJK_TARGET_END = re.compile(r"\s*(?:$|[,.!?，。！？]|呢|吗|啊|是多少)")
+
+_CHINESE_DIGITS = {'零': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+_CHINESE_UNITS = {'十': 10, '百': 100, '千': 1000, '万': 10000, '亿': 100000000}
+_ENGLISH_NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "hundred": 100, "thousand": 1000,
+}
+
+
+def parse_chinese_number(text: str) -> Optional[int]:
+    """
+    "三百五十" -> 350, "两万" -> 20000
+    """
+    total, section, digit = 0, 0, None
+    for char in text:
+        if char in _CHINESE_DIGITS:
+            digit = _CHINESE_DIGITS[char]
+        elif char in ('万', '亿'):
+            section = (section + (digit or 0)) or 1
+            total += section * _CHINESE_UNITS[char]
+            section, digit = 0, None
+        elif char in _CHINESE_UNITS:
+            section += (1 if digit is None else digit) * _CHINESE_UNITS[char]
+            digit = None
+        else:
+            return None
+    return total + section + (digit or 0)
+
+
+class ConversionParser:
+    """
+    Parses conversion queries ("100 usd to eur", "5公里是多少英里") into Conversion card parameters
+    """
+    
+    def parse(self, query: str) -> Optional[Dict[str, str]]:
+        """
+        Conversion card parameters, or None when the query is not clearly a conversion.
+        Needs a source unit right after a number and a target unit of the same dimension right after a cue.
+        """
+        source, target = None, None
+        for match in _UNIT_PATTERN.finditer(query):
+            unit, dimension = UNIT_ALIASES[_WHITESPACE.sub(" ", match.group(0).lower())]
+            prefix = query[:match.start()]
+            if source is None:
+                number = _NUMBER_BEFORE.search(prefix)
+                if number:
+                    value = self._number_value(number)
+                    if value is not None:
+                        source = (unit, dimension, value)
+                        continue
+            if target is None and _CUE_BEFORE.search(prefix):
+                if _CJK_CHAR.search(match.group(0)) and not _CJK_TARGET_END.match(query, match.end()):
+                    continue
+                target = (unit, dimension)
+        
+        if source is None or target is None or source[0] == target[0] or source[1] != target[1]:
+            return None
+        return {
+            "input_value": source[2],
+            "input_unit": source[0],
+            "output_unit": target[0],
+        }
+    
+    @staticmethod
+    def _number_value(number: "re.Match") -> Optional[str]:
+        if number.group("arabic"):
+            return number.group("arabic").replace(",", "")
+        if number.group("chinese"):
+            value = parse_chinese_number(number.group("chinese"))
+            return None if value is None else str(value)
+        return str(_ENGLISH_NUMBERS[number.group("english").lower()])
@@ -0,0 +1,68 @@
+import pytest
+
+from services.airport_index import AirportIndex, get_airport_index, normalize_place, parse_user_location
+
+
+@pytest.fixture(scope="module")
+def index():
+    return get_airport_index()
+
+
+@pytest.mark.parametrize("place, codes", [
+    ("SFO", ["SFO"]),
+    ("sfo", ["SFO"]),
+    ("NYC", ["JFK", "LGA", "EWR"]),
+    ("New York", ["JFK", "LGA", "EWR"]),
+    ("San Francisco International Airport", ["SFO"]),
+    ("Los Angeles, CA", ["LAX"]),
+    ("旧金山", ["SFO"]),
+    ("上海浦东国际机场", ["PVG"]),
+    ("虹桥机场", ["SHA"]),
+    ("san fr", ["SFO"]),
+    ("lon", ["LHR", "LGW", "STN", "LCY"]),
+    ("new y", ["JFK", "LGA", "EWR"]),
+    ("newa", ["EWR"]),
+    ("san fransisco", ["SFO"]),
+])
+def test_resolve(index, place, codes):
+    assert index.resolve(place) == codes
+
+
+@pytest.mark.parametrize("place", ["", "   ", "qwerty", "xq"])
+def test_resolve_unknown(index, place):
+    assert index.resolve(place) == []
+
+
+@pytest.mark.parametrize("place", ["new", "New"])
+def test_resolve_ambiguous_prefix(index, place):
+    # new chitose, new delhi and new york all start with "new"
+    assert index.resolve(place) == []
+
+
+def test_nearest(index):
+    assert index.nearest(37.77, -122.42) == "SFO"
+    assert index.nearest(51.47, -0.45) == "LHR"
+    assert AirportIndex([]).nearest(0, 0) is None
+
+
+def test_describe(index):
+    assert index.describe("LGA") == "LaGuardia (LGA)"
+    assert index.describe("ZZZ") == "ZZZ"
+
+
+def test_normalize_place():
+    assert normalize_place("  Heathrow   Airport ") == "heathrow"
+    assert normalize_place("浦东国际机场") == "浦东"
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("37.77,-122.41", ((37.77, -122.41), None)),
+    ("37.77 -122.41", ((37.77, -122.41), None)),
+    ('{"latitude": 51.5, "longitude": -0.12}', ((51.5, -0.12), None)),
+    ('{"city": "Tokyo"}', (None, "Tokyo")),
+    ("San Francisco", (None, "San Francisco")),
+    ("91,200", (None, "91,200")),
+    ("  ", (None, None)),
+])
+def test_parse_user_location(location, expected):
+    assert parse_user_location(location) == expected
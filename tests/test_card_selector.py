@@ -0,0 +1,121 @@
+import asyncio
+import gc
+import json
+import os
+
+import pytest
+
+from services.card_selector import CardSelector, _cancel_quietly
+from services.llm_backends import MockBackend
+from services.openai_service import OpenAIService
+from services.precomputed_answers import PrecomputedAnswers, write_precomputed_answers
+from services.session_store import InMemorySessionStore
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
+def load_example(name):
+    with open(os.path.join(EXAMPLES, name, "request.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_selector(speculative, content='{"card_type": "InfoCard", "parameters": {}}'):
+    requests = []
+
+    def responder(request):
+        requests.append(request)
+        return content
+
+    selector = CardSelector()
+    selector.speculative = speculative
+    selector.precomputed = None
+    selector.session_store = None
+    selector.openai_service = OpenAIService(backend=MockBackend(responder=responder))
+    return selector, requests
+
+
+@pytest.mark.parametrize("query, screen_content", [
+    ("what is this phone", load_example("infocard_with_screen_data")["screen_content"]),
+    # Points at the screen but nothing is found there, so both modes ask the model
+    ("help me buy the product", '{"hierarchy": {}}'),
+])
+def test_speculative_and_sequential_send_same_prompt(query, screen_content):
+    prompts = []
+    for speculative in (True, False):
+        selector, requests = make_selector(speculative)
+        asyncio.run(selector.select_card(query, screen_content))
+        prompts.append([request.messages for request in requests])
+    assert prompts[0] and prompts[0] == prompts[1]
+
+
+def test_screen_reference_resolved_locally():
+    example = load_example("shopping_with_screen_data")
+    selector, requests = make_selector(True)
+    cards = asyncio.run(selector.select_card(example["query"], example["screen_content"]))
+    assert cards[0].card_name == "ShoppingSearchResults"
+    assert cards[0].data["search_query"] == "拉布布"
+
+
+def test_screen_reference_is_never_served_precomputed(tmp_path):
+    example = load_example("shopping_with_screen_data")
+    path = str(tmp_path / "answers.tsv")
+    write_precomputed_answers(path, [(example["query"], {
+        "card_type": "ShoppingCard", "parameters": {"search_query": "smartphone"}
+    })])
+    selector, _ = make_selector(True)
+    selector.precomputed = PrecomputedAnswers(path)
+    cards = asyncio.run(selector.select_card(example["query"], example["screen_content"]))
+    assert cards[0].data["search_query"] == "拉布布"
+    assert selector.precomputed.hits == 0
+
+
+@pytest.mark.parametrize("turn, sends_context", [
+    (("InfoCard", "michael jordan"), True),
+    # Nothing person-like resolved yet, so the screen still has to be read
+    (("FlightsCard", "LAX"), False),
+])
+def test_follow_up_sends_session_context_instead_of_screen(turn, sends_context):
+    selector, requests = make_selector(False)
+    selector.session_store = InMemorySessionStore()
+    asyncio.run(selector.session_store.record("s1", *turn))
+    asyncio.run(selector.select_card("please introduce him", '{"hierarchy": {}}', session_id="s1"))
+    prompt = requests[0].messages[-1]["content"]
+    assert ("Recent context" in prompt) == sends_context
+    assert ("No meaningful text content found in screen." in prompt) != sends_context
+
+
+def test_overrides_only_apply_to_matching_card():
+    example = load_example("infocard_with_screen_data")
+    content = (
+        '{"cards": [{"card_type": "InfoCard", "parameters": {"query": "him"}},'
+        ' {"card_type": "ChatCard", "parameters": {"query": "chat about basketball"}}]}'
+    )
+    selector, _ = make_selector(False, content)
+    cards = asyncio.run(selector.select_card(example["query"], example["screen_content"], max_cards=2))
+    assert [card.card_name for card in cards] == ["InfoCard", "ChatCard"]
+    assert cards[0].data["query"] == "michael jordan"
+    assert cards[1].data["query"] == "chat about basketball"
+
+
+@pytest.mark.parametrize("cancel", [_cancel_quietly, asyncio.Task.cancel])
+def test_cancelled_model_call_leaves_no_unretrieved_exception(cancel):
+    async def upstream():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            # e.g. the HTTP client failing while it tears the request down
+            raise RuntimeError("connection reset")
+
+    errors = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        task = asyncio.create_task(upstream())
+        await asyncio.sleep(0)
+        cancel(task)
+        await asyncio.sleep(0.01)
+        del task
+        gc.collect()
+
+    asyncio.run(scenario())
+    assert bool(errors) == (cancel is asyncio.Task.cancel)
@@ -0,0 +1,38 @@
+from services.card_validator import CardValidator
+
+
+def conversion_defaults():
+    return {"input_value": "1", "input_unit": "USD", "output_unit": "EUR"}
+
+
+def test_valid_data_is_coerced():
+    validator = CardValidator()
+    data = validator.validate("Videos", {"topic": "dunks"}, dict)
+    assert data == {"topic": "dunks"}
+    assert (validator.repaired, validator.failed) == (0, 0)
+
+
+def test_numbers_are_stringified():
+    validator = CardValidator()
+    data = validator.validate("Conversion", {"input_value": 100, "input_unit": "km", "output_unit": "mi"},
+                              conversion_defaults)
+    assert data == {"input_value": "100", "input_unit": "km", "output_unit": "mi"}
+    assert validator.repaired == 1
+
+
+def test_bad_fields_fall_back_to_defaults():
+    validator = CardValidator()
+    data = validator.validate("Conversion", {"input_value": "5", "input_unit": None, "output_unit": ["mi"]},
+                              conversion_defaults)
+    assert data == {"input_value": "5", "input_unit": "USD", "output_unit": "EUR"}
+
+
+def test_unrepairable_data_is_returned_unchanged():
+    validator = CardValidator()
+    data = {"input_value": "5", "input_unit": None, "output_unit": "mi"}
+    assert validator.validate("Conversion", data, dict) == data
+    assert validator.failed == 1
+
+
+def test_unknown_card_passes_through():
+    assert CardValidator().validate("Hologram", {"x": 1}, dict) == {"x": 1}
@@ -0,0 +1,58 @@
+import pytest
+
+from services.entity_extractor import EntityExtractor, PERSON_INTENT, SHOPPING_INTENT
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return EntityExtractor()
+
+
+@pytest.mark.parametrize("query", [
+    "help me buy the product",
+    "I want to purchase this",
+    "buy it for me",
+    "帮我买这个",
+    "我想买同款",
+    "帮我买这个吧",
+])
+def test_shopping_intent(extractor, query):
+    assert extractor.detect_intent(query) == SHOPPING_INTENT
+
+
+@pytest.mark.parametrize("query", [
+    "please introduce him",
+    "who is this guy?",
+    "介绍一下他",
+    "他是谁",
+])
+def test_person_intent(extractor, query):
+    assert extractor.detect_intent(query) == PERSON_INTENT
+
+
+@pytest.mark.parametrize("query", [
+    "help me buy a flight to New York, one way",
+    "I want to buy a laptop, is it good?",
+    "buy it in New York",
+    "order one pizza",
+    "tell me about them",
+    "who is the president",
+    "帮我买一个手机",
+    "介绍一下他的作品",
+])
+def test_queries_not_about_the_screen(extractor, query):
+    assert extractor.detect_intent(query) is None
+
+
+def test_extract_product_from_screen_texts(extractor):
+    texts = ["你知道拉布布吗", "今天天气很好，我们一起去公园散步吧"]
+    assert extractor.extract("help me buy the product", texts) == (SHOPPING_INTENT, "拉布布")
+
+
+def test_extract_known_person(extractor):
+    texts = ["Basketball", "迈克尔·乔丹 - 百科"]
+    assert extractor.extract("please introduce him", texts) == (PERSON_INTENT, "michael jordan")
+
+
+def test_no_intent_means_no_extraction(extractor):
+    assert extractor.extract("help me buy a flight to New York, one way", ["拉布布"]) is None
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from config import Config
+from services.llm_backends import (
+    CompletionRequest, LLMBackend, MockBackend, OpenAICompatibleBackend, completion_key, create_llm_backend
+)
+
+
+@pytest.fixture
+def backend_config(monkeypatch):
+    def configure(backend, api_key=None):
+        monkeypatch.setattr(Config, "LLM_BACKEND", backend)
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", api_key)
+    return configure
+
+
+@pytest.mark.parametrize("environment, backend", [
+    ({"OPENAI_API_KEY": "sk-real"}, "openai"),
+    ({"OPENAI_API_KEY": "your_cerebras_api_key_here"}, "mock"),
+    ({}, "mock"),
+    ({"OPENAI_API_KEY": "sk-real", "LLM_BACKEND": "local"}, "local"),
+])
+def test_default_backend(environment, backend):
+    # Config is evaluated at import, so check it in a fresh interpreter
+    env = {key: value for key, value in os.environ.items() if key not in ("OPENAI_API_KEY", "LLM_BACKEND")}
+    env.update(environment)
+    output = subprocess.run(
+        [sys.executable, "-c", "from config import Config; print(Config.LLM_BACKEND)"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == backend
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        LLMBackend(30, 1)
+
+
+@pytest.mark.parametrize("api_key", [None, "", "your_cerebras_api_key_here"])
+def test_openai_backend_requires_key(backend_config, api_key):
+    backend_config("openai", api_key)
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        create_llm_backend()
+
+
+def test_backend_selection(backend_config):
+    backend_config("openai", "sk-test")
+    backend = create_llm_backend()
+    assert isinstance(backend, OpenAICompatibleBackend)
+    assert (backend.name, backend.api_key) == ("openai", "sk-test")
+
+    backend_config("local")
+    backend = create_llm_backend()
+    assert isinstance(backend, OpenAICompatibleBackend)
+    assert (backend.name, backend.base_url) == ("local", Config.LOCAL_LLM_BASE_URL)
+
+    backend_config("mock")
+    assert isinstance(create_llm_backend(), MockBackend)
+
+    backend_config("nope")
+    with pytest.raises(ValueError):
+        create_llm_backend()
+
+
+def test_mock_backend_serves_recordings_in_turn():
+    backend = MockBackend(responder=lambda request: "fallback")
+    request = CompletionRequest([{"role": "user", "content": "hi"}], "hi")
+    backend.add(request.key(), "first")
+    backend.add(request.key(), "second")
+
+    async def scenario():
+        other = CompletionRequest([{"role": "user", "content": "other"}], "other")
+        return [await backend.complete(request) for _ in range(3)] + [await backend.complete(other)]
+
+    assert asyncio.run(scenario()) == ["first", "second", "first", "fallback"]
+
+
+def test_completion_key_separates_retries():
+    assert completion_key("q", None, 1, 2) == completion_key("q", "", 1, 2)
+    assert completion_key("q", None, 1, 2) != completion_key("q", None, 1, 4)
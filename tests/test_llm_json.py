@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from services.llm_json import extract_first_object, parse_llm_json, repair_json, valid_analysis
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1,', {"a": 1}),
+    ('{"a": [1, 2,', {"a": [1, 2]}),
+    ('{"a": {"b": "c",  ', {"a": {"b": "c"}}),
+    ('{"a": "x,', {"a": "x,"}),
+    ("{'a': True, 'b': None,}", {"a": True, "b": None}),
+    ('{"a": 1, // note\n "b": [1,]}', {"a": 1, "b": [1]}),
+    ("{'a': 'it\\'s'}", {"a": "it's"}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_extract_first_object():
+    text = 'Sure! ```json\n{"card_type": "InfoCard", "parameters": {"query": "a } b"}}\n``` Hope this helps {x}'
+    assert extract_first_object(text) == '{"card_type": "InfoCard", "parameters": {"query": "a } b"}}'
+    assert extract_first_object("no json here") is None
+
+
+@pytest.mark.parametrize("content, outcome", [
+    ('{"card_type": "InfoCard", "parameters": {"query": "x"}}', "direct"),
+    ('Here you go: {"card_type": "InfoCard", "parameters": {"query": "x"}} done', "extracted"),
+    ('{"card_type": "InfoCard", "parameters": {"query": "x"},', "repaired"),
+    ('{"card_type": "NotACard", "parameters": {}}', "invalid"),
+    ("not json at all", "failed"),
+])
+def test_parse_outcomes(content, outcome):
+    analysis, result = parse_llm_json(content)
+    assert result == outcome
+    assert (analysis is None) == (outcome in ("invalid", "failed"))
+
+
+def test_invalid_cards_are_dropped():
+    analysis, outcome = parse_llm_json(json.dumps({"cards": [
+        {"card_type": "InfoCard", "parameters": {"query": "x"}},
+        {"card_type": "Hologram", "parameters": {}},
+        {"card_type": "Videos", "parameters": "topic"},
+        {"card_type": "Videos", "parameters": {"topic": "x"}},
+    ]}))
+    assert outcome == "direct"
+    assert [card["card_type"] for card in analysis["cards"]] == ["InfoCard", "Videos"]
+
+
+def test_valid_analysis():
+    assert valid_analysis({"cards": [{"card_type": "Hologram"}]}) is None
+    assert valid_analysis({"cards": "InfoCard"}) is None
+    assert valid_analysis(["InfoCard"]) is None
+    assert valid_analysis({"card_type": "InfoCard"}) == {"card_type": "InfoCard"}
@@ -0,0 +1,32 @@
+import asyncio
+import json
+import os
+
+from services.llm_backends import MockBackend
+from services.openai_service import OpenAIService
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "examples", "infocard_with_screen_data", "request.json")
+with open(EXAMPLE, encoding="utf-8") as f:
+    SCREEN = json.load(f)["screen_content"]
+
+
+def prompt_for(query, screen_content=None, session_context=None):
+    requests = []
+
+    def responder(request):
+        requests.append(request)
+        return '{"card_type": "InfoCard", "parameters": {}}'
+
+    service = OpenAIService(backend=MockBackend(responder=responder))
+    asyncio.run(service.analyze_query(query, screen_content, session_context=session_context))
+    return requests[0].messages[-1]["content"]
+
+
+def test_session_context_replaces_screen_summary():
+    screen_summary = OpenAIService(backend=MockBackend()).screen_processor.get_context_summary(SCREEN)
+    assert "michael jordan" in screen_summary.lower()
+    prompt = prompt_for("please introduce him", SCREEN, "Recent context: InfoCard 'michael jordan'")
+    assert "Recent context: InfoCard 'michael jordan'" in prompt
+    assert screen_summary not in prompt
+    assert screen_summary in prompt_for("please introduce him", SCREEN)
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from services.precomputed_answers import (
+    PrecomputedAnswers, is_precomputable, is_screen_independent, normalize_query, write_precomputed_answers
+)
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   Bitcoin? ") == "what is bitcoin"
+    assert normalize_query("比特币是什么？") == "比特币是什么"
+
+
+@pytest.mark.parametrize("query", ["what is bitcoin", "100 usd to eur", "巴黎有什么好玩的"])
+def test_precomputable(query):
+    assert is_screen_independent(query)
+    assert is_precomputable(query)
+
+
+@pytest.mark.parametrize("query", [
+    "who is this",
+    "help me buy it",
+    "介绍一下他",
+    "这个多少钱",
+    "help me buy the product",
+    "buy the item",
+    "purchase the one",
+    "帮我买同款",
+])
+def test_screen_references(query):
+    assert not is_screen_independent(query)
+    assert not is_precomputable(query)
+
+
+@pytest.mark.parametrize("query", [
+    "flights to paris tomorrow",
+    "weather today",
+    "restaurants open tonight",
+    "concerts next weekend",
+    "book a table on friday",
+    "明天天气怎么样",
+    "后天去上海的机票",
+    "下周的航班",
+    "星期五的电影",
+])
+def test_relative_dates_are_not_precomputable(query):
+    assert is_screen_independent(query)
+    assert not is_precomputable(query)
+
+
+def test_lookup_and_hot_reload(tmp_path):
+    path = str(tmp_path / "answers.tsv")
+    write_precomputed_answers(path, [("What is Bitcoin?", {"card_type": "InfoCard", "parameters": {"query": "bitcoin"}})])
+    answers = PrecomputedAnswers(path, reload_interval=0)
+    assert answers.lookup("what is bitcoin")["card_type"] == "InfoCard"
+    assert answers.lookup("what is ethereum") is None
+    first_mapping = answers._mapping
+
+    write_precomputed_answers(path, [("what is ethereum", {"card_type": "InfoCard", "parameters": {}})])
+    os.utime(path, (1, 1))
+    assert answers.lookup("what is ethereum") == {"card_type": "InfoCard", "parameters": {}}
+    assert answers.lookup("what is bitcoin") is None
+    assert first_mapping.closed
+
+    os.remove(path)
+    assert answers.lookup("what is ethereum") is None
+    assert len(answers) == 0
+
+
+def test_file_format(tmp_path):
+    path = str(tmp_path / "answers.tsv")
+    write_precomputed_answers(path, [("Hello  World", {"card_type": "Translation"})])
+    with open(path, encoding="utf-8") as f:
+        key, value = f.read().rstrip("\n").split("\t")
+    assert key == "hello world"
+    assert json.loads(value) == {"card_type": "Translation"}
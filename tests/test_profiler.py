@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import main
+from services.profiler import UPSTREAM_WAIT, ProfilerBusy, WorkerProfiler
+from services.request_stages import collecting_timings, stage, stage_tracker
+
+
+def busy_in_stage(name, stop):
+    # Enter the stage once profiling has started, since stages are only tracked while active
+    while not stage_tracker.active and not stop.is_set():
+        time.sleep(0.001)
+    with stage(name):
+        while not stop.is_set():
+            sum(range(100))
+
+
+def test_sampled_stacks_are_tagged_with_the_stage():
+    profiler = WorkerProfiler(interval=0.005)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_in_stage, args=("screen_extraction", stop), name="worker")
+    worker.start()
+    try:
+        result = asyncio.run(profiler.profile(0.3, mode="sample", allocations=False))
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result["mode"] == "sample"
+    assert result["stages"]["screen_extraction"] > 0
+    assert any(
+        line.startswith("stage:screen_extraction;worker;") and "busy_in_stage" in line
+        for line in result["collapsed"].splitlines()
+    )
+    assert stage_tracker.active is False and stage_tracker.thread_stages == {}
+
+
+def test_event_loop_is_tagged_as_waiting_on_upstream():
+    profiler = WorkerProfiler(interval=0.005)
+
+    async def scenario():
+        async def upstream_call():
+            while not stage_tracker.active:
+                await asyncio.sleep(0.001)
+            with stage("upstream", waiting=True):
+                await asyncio.sleep(0.5)
+
+        call = asyncio.create_task(upstream_call())
+        result = await profiler.profile(0.2, mode="sample", allocations=False)
+        await call
+        return result
+
+    assert asyncio.run(scenario())["stages"][UPSTREAM_WAIT] > 0
+
+
+def test_only_one_profile_runs_at_a_time():
+    profiler = WorkerProfiler()
+
+    async def scenario():
+        first = asyncio.create_task(profiler.profile(0.2, mode="cprofile", allocations=False))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ProfilerBusy):
+            await profiler.profile(0.2, mode="cprofile", allocations=False)
+        return await first
+
+    assert asyncio.run(scenario())["mode"] == "cprofile"
+    # The lock is released afterwards
+    assert asyncio.run(profiler.profile(0.1, mode="cprofile", allocations=False))["seconds"] == 0.1
+
+
+def test_duration_is_capped():
+    profiler = WorkerProfiler(max_seconds=0.2)
+    start = time.monotonic()
+    result = asyncio.run(profiler.profile(30, mode="sample", allocations=False))
+    assert result["seconds"] == 0.2
+    assert time.monotonic() - start < 5
+
+
+def test_stage_timings_accumulate():
+    timings = {}
+    with collecting_timings(timings):
+        for _ in range(2):
+            with stage("upstream", waiting=True):
+                pass
+    with stage("untracked"):
+        pass
+    assert list(timings) == ["upstream"]
+
+
+def test_ready_returns_503_until_warmed_up():
+    main.app.state.ready = False
+    response = asyncio.run(main.readiness_check())
+    assert response.status_code == 503
+    assert json.loads(response.body) == {"status": "warming_up"}
+
+    main.app.state.ready = True
+    assert asyncio.run(main.readiness_check()) == {"status": "ready"}
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+
+from services.request_scheduler import BACKGROUND, INTERACTIVE, DeadlineExceeded, Lane, RequestScheduler
+
+
+def make_scheduler(concurrency=1, interactive_deadline=5.0, background_deadline=5.0):
+    return RequestScheduler(concurrency, [
+        Lane(INTERACTIVE, 8, interactive_deadline, drop_expired=False),
+        Lane(BACKGROUND, 1, background_deadline, drop_expired=True),
+    ])
+
+
+def test_concurrency_is_capped():
+    scheduler = make_scheduler(concurrency=2)
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(
+            scheduler.run(INTERACTIVE, scheduler.deadline(INTERACTIVE), call) for _ in range(6)
+        ))
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    assert peak == 2
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()["lanes"][INTERACTIVE]["served"] == 6
+
+
+def test_interactive_lane_gets_its_weighted_share():
+    scheduler = make_scheduler(concurrency=1)
+    order = []
+
+    def call(name):
+        async def run():
+            order.append(name)
+            await asyncio.sleep(0.001)
+        return run
+
+    async def scenario():
+        # Occupy the only slot so everything below queues
+        blocker = asyncio.create_task(scheduler.run(BACKGROUND, scheduler.deadline(BACKGROUND), call("blocker")))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(scheduler.run(BACKGROUND, scheduler.deadline(BACKGROUND), call("background")))
+                 for _ in range(4)]
+        tasks += [asyncio.create_task(scheduler.run(INTERACTIVE, scheduler.deadline(INTERACTIVE), call("interactive")))
+                  for _ in range(8)]
+        await asyncio.gather(blocker, *tasks)
+
+    asyncio.run(scenario())
+    # With weights 8:1, background work queued first only gets one of the first nine slots
+    assert order[1:10].count("background") == 1
+    assert order.count("background") == 4
+
+
+def test_deadline_while_running():
+    scheduler = make_scheduler(background_deadline=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(DeadlineExceeded) as error:
+        asyncio.run(scheduler.run(BACKGROUND, scheduler.deadline(BACKGROUND), slow))
+    assert error.value.stage == "running"
+    assert scheduler.lanes[BACKGROUND].expired_running == 1
+    assert scheduler.in_flight == 0
+
+
+def test_deadline_while_queued():
+    scheduler = make_scheduler(background_deadline=0.05)
+
+    async def slow():
+        await asyncio.sleep(0.2)
+
+    async def scenario():
+        blocker = asyncio.create_task(scheduler.run(INTERACTIVE, scheduler.deadline(INTERACTIVE), slow))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded) as error:
+            await scheduler.run(BACKGROUND, scheduler.deadline(BACKGROUND), slow)
+        await blocker
+        return error.value
+
+    assert asyncio.run(scenario()).stage == "queued"
+    assert scheduler.lanes[BACKGROUND].expired_in_queue == 1
+    assert scheduler.in_flight == 0
+
+
+def test_expired_before_queueing():
+    scheduler = make_scheduler()
+
+    async def call():
+        return "never"
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(scheduler.run(INTERACTIVE, time.monotonic() - 1, call))
+
+
+def test_failures_release_the_slot():
+    scheduler = make_scheduler()
+
+    async def fail():
+        raise RuntimeError("upstream down")
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await scheduler.run(INTERACTIVE, scheduler.deadline(INTERACTIVE), fail)
+        return await scheduler.run(INTERACTIVE, scheduler.deadline(INTERACTIVE), ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert scheduler.lanes[INTERACTIVE].failed == 1
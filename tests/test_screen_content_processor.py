@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from services.screen_content_processor import ScreenContentProcessor
+
+
+def node(text=None, bounds=None, children=None, **attributes):
+    result = {}
+    if text is not None:
+        attributes["text"] = text
+    if attributes:
+        result["attributes"] = attributes
+    if bounds is not None:
+        result["bounds"] = dict(zip(("left", "top", "right", "bottom"), bounds))
+    if children is not None:
+        result["children"] = children
+    return result
+
+
+def extract(hierarchy, viewport=(1080, 2400)):
+    screen = {"hierarchy": hierarchy}
+    if viewport:
+        screen["deviceInfo"] = {"width": viewport[0], "height": viewport[1]}
+    processor = ScreenContentProcessor(chrome_resource_patterns=[r":id/status_bar$"], prune_offscreen=True)
+    return sorted(item.text for item in processor.extract_text_content(json.dumps(screen)))
+
+
+def test_container_without_bounds_is_kept():
+    hierarchy = node(children=[node("Michael Jordan", (0, 100, 500, 200))])
+    assert extract(hierarchy) == ["Michael Jordan"]
+
+
+def test_partial_bounds_are_treated_as_unknown():
+    hierarchy = {"bounds": {"left": 0, "top": 0}, "children": [node("Chicago Bulls", (0, 100, 500, 200))]}
+    assert extract(hierarchy) == ["Chicago Bulls"]
+
+
+@pytest.mark.parametrize("bounds", [(0, 0, 0, 0), (0, 300, 1080, 300)])
+def test_zero_size_node_keeps_children(bounds):
+    hierarchy = node("Hidden label", bounds, children=[node("Visible title", (0, 100, 500, 200))])
+    assert extract(hierarchy) == ["Visible title"]
+
+
+@pytest.mark.parametrize("bounds", [(0, 2500, 1080, 2600), (0, 3000, 0, 3000), (-600, 0, -100, 100)])
+def test_offscreen_subtree_is_pruned(bounds):
+    hierarchy = node(children=[
+        node("Offscreen", bounds, children=[node("Offscreen child", (0, 100, 500, 200))]),
+        node("Onscreen", (0, 100, 500, 200)),
+    ])
+    assert extract(hierarchy) == ["Onscreen"]
+
+
+def test_chrome_subtree_is_skipped():
+    hierarchy = node(children=[
+        node("12:30", (0, 0, 1080, 60), resourceId="com.android.systemui:id/status_bar"),
+        node("Article title", (0, 100, 1080, 200)),
+    ])
+    assert extract(hierarchy) == ["Article title"]
+
+
+def test_without_viewport_only_zero_size_text_is_dropped():
+    hierarchy = node(children=[node("Far away", (0, 5000, 500, 5100)), node("Empty", (10, 10, 10, 10))])
+    assert extract(hierarchy, viewport=None) == ["Far away"]
+
+
+def test_null_attributes_do_not_drop_the_screen():
+    hierarchy = node(children=[
+        node("Article title", (0, 100, 1080, 200), resourceId=None, className=None),
+        node(None, (0, 200, 1080, 300), contentDescription=None),
+        node("Byline", (0, 300, 1080, "400")),
+    ])
+    assert extract(hierarchy) == ["Article title", "Byline"]
+
+
+def test_pruning_only_drops_zero_size_text_from_example_ranking():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "examples", "infocard_with_screen_data", "request.json")
+    with open(path, encoding="utf-8") as f:
+        hierarchy = json.loads(json.load(f)["screen_content"])["hierarchy"]
+    pruned, unpruned = [], []
+    ScreenContentProcessor(prune_offscreen=True)._traverse_hierarchy(hierarchy, pruned)
+    ScreenContentProcessor(prune_offscreen=False)._traverse_hierarchy(hierarchy, unpruned)
+    zero_size = [item for item in unpruned if item.bounds and not ScreenContentProcessor()._has_area(item.bounds)]
+    # The example screen has zero-size text nodes, which is why its top 20 differs from the legacy ranking
+    assert zero_size
+    assert [item.text for item in pruned] == [item.text for item in unpruned if item not in zero_size]
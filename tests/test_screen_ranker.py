@@ -0,0 +1,54 @@
+import pytest
+
+from services.screen_content_processor import ScreenTextItem
+from services.screen_ranker import FEATURE_NAMES, ScreenTextRanker, resource_id_tokens
+
+
+def item(text="Michael Jordan", depth=3, class_name="android.widget.TextView", resource_id="",
+         clickable=False, bounds=None, type="text"):
+    return ScreenTextItem(text, depth, type, class_name, resource_id, clickable, bounds)
+
+
+def test_resource_id_tokens():
+    assert resource_id_tokens("com.app:id/chat_title2") == ["chat", "title2"]
+    assert resource_id_tokens("") == []
+
+
+def test_default_weights_match_original_priority_score():
+    ranker = ScreenTextRanker()
+    # depth * 2 + clickable 10 + TextView 5 + min(len, 20)
+    assert ranker.score(item(clickable=True)) == 3 * 2 + 10 + 5 + 14
+
+
+def test_resource_id_weights():
+    ranker = ScreenTextRanker({"weights": {}, "resource_id_tokens": {"title": 4, "ad": -10}})
+    assert ranker.score(item(resource_id="com.app:id/video_title")) == 4
+    assert ranker.score(item(resource_id="com.app:id/ad_banner")) == -10
+
+
+def test_feature_vector():
+    vector = ScreenTextRanker().feature_vector(item("你好ab", bounds=(0, 0, 540, 1200)), (1080, 2400))
+    features = dict(zip(FEATURE_NAMES, vector))
+    assert features["area_ratio"] == 0.25
+    assert (features["center_x"], features["center_y"]) == (0.25, 0.25)
+    assert features["cjk_ratio"] == 0.5
+
+
+def test_unknown_feature_is_rejected():
+    with pytest.raises(ValueError):
+        ScreenTextRanker({"weights": {"font_size": 1.0}})
+
+
+@pytest.mark.parametrize("weights", [
+    {"depth": 2, "clickable": 10, "text_view_or_button": 5, "text_length": 1},
+    {"depth": -0.5, "edit_text": 3, "is_description": 2, "area_ratio": 4, "cjk_ratio": 7},
+    {},
+])
+def test_score_matches_weighted_feature_vector(weights):
+    ranker = ScreenTextRanker({"bias": 1.5, "weights": weights})
+    viewport = (1080, 2400)
+    for candidate in (item(clickable=True, bounds=(0, 0, 540, 1200)),
+                      item("你好", class_name="android.widget.EditText", type="description")):
+        vector = dict(zip(FEATURE_NAMES, ranker.feature_vector(candidate, viewport)))
+        expected = 1.5 + sum(weight * vector[name] for name, weight in weights.items())
+        assert ranker.score(candidate, viewport) == pytest.approx(expected)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from services.session_store import (
+    InMemorySessionStore, SessionStore, SQLiteSessionStore, format_session_context
+)
+
+
+def memory_store(**kwargs):
+    return InMemorySessionStore(**kwargs)
+
+
+def sqlite_store(tmp_path, **kwargs):
+    return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), prune_interval=0, **kwargs)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    if request.param == "memory":
+        return memory_store
+    return lambda **kwargs: sqlite_store(tmp_path, **kwargs)
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_keeps_last_turns_without_repeats(make_store):
+    store = make_store(max_turns=2)
+
+    async def scenario():
+        await store.record("s1", "InfoCard", "michael jordan")
+        await store.record("s1", "ShoppingSearchResults", "拉布布")
+        await store.record("s1", "InfoCard", "michael jordan")
+        await store.record("s1", "Videos", "basketball")
+        return await store.get("s1"), await store.get("unknown")
+
+    turns, unknown = asyncio.run(scenario())
+    assert turns == [("InfoCard", "michael jordan"), ("Videos", "basketball")]
+    assert unknown == []
+
+
+def test_expired_sessions_are_forgotten(make_store):
+    store = make_store(ttl_seconds=-1)
+
+    async def scenario():
+        await store.record("s1", "InfoCard", "michael jordan")
+        return await store.get("s1")
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_size_cap(make_store):
+    store = make_store(max_sessions=2)
+
+    async def scenario():
+        for session_id in ("s1", "s2", "s3"):
+            await store.record(session_id, "InfoCard", session_id)
+        return [await store.get(session_id) for session_id in ("s1", "s2", "s3")]
+
+    assert asyncio.run(scenario()) == [[], [("InfoCard", "s2")], [("InfoCard", "s3")]]
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    async def scenario():
+        await sqlite_store(tmp_path).record("s1", "InfoCard", "michael jordan")
+        return await sqlite_store(tmp_path).get("s1")
+
+    assert asyncio.run(scenario()) == [("InfoCard", "michael jordan")]
+
+
+def test_format_session_context():
+    assert format_session_context([]) is None
+    assert format_session_context([("InfoCard", "michael jordan"), ("Videos", "dunks")]) == (
+        "Recent context: InfoCard 'michael jordan'; Videos 'dunks'"
+    )
@@ -0,0 +1,66 @@
+import glob
+import json
+
+from services.llm_backends import CompletionRequest
+from services.request_stages import stage
+from services.traffic_capture import (
+    REDACTED, TrafficCapture, TrafficRecorder, capturing, compress_text, decompress_text, read_traffic,
+    record_upstream, redact, redact_json_text
+)
+
+
+def test_redact():
+    assert redact("mail me at jane.doe@example.com or +1 (415) 555-0100") == (
+        f"mail me at {REDACTED} or {REDACTED}"
+    )
+    assert redact("flight 123 tomorrow") == "flight 123 tomorrow"
+
+
+def test_redact_json_text_keeps_numbers():
+    screen = json.dumps({"text": "call 415 555 0100", "bounds": {"left": 1080000, "top": 24000000}})
+    assert json.loads(redact_json_text(screen)) == {"text": f"call {REDACTED}", "bounds": {
+        "left": 1080000, "top": 24000000}}
+    assert redact_json_text("not json 415 555 0100") == f"not json {REDACTED}"
+
+
+def test_compress_round_trip():
+    assert decompress_text(compress_text("拉布布 " * 100)) == "拉布布 " * 100
+    assert compress_text(None) is None and decompress_text(None) is None
+
+
+def test_capturing_collects_upstream_and_timings():
+    capture = TrafficCapture()
+    with capturing(capture):
+        with stage("prompt_build"):
+            pass
+        record_upstream(CompletionRequest([{"role": "user", "content": "q"}], "q"), content="{}")
+    record_upstream(CompletionRequest([], "ignored"), content="{}")
+    assert set(capture.timings) == {"prompt_build"}
+    assert capture.upstream == [{"query": "q", "max_cards": 1, "turns": 1, "content": "{}", "error": None}]
+
+
+def test_recorder_writes_readable_redacted_records(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path), sample_rate=1.0)
+    recorder.submit({
+        "ts": 1.0,
+        "path": "/initial",
+        "status": 200,
+        "headers": {"x-brain-user-location": "37.77,-122.41", "x-brain-session-id": "s1",
+                    "x-brain-request-class": "background"},
+        "request_body": json.dumps({"query": "email a@b.co", "screen_content": '{"hierarchy": {}}'}).encode(),
+        "response_body": json.dumps({"card_list": [{"card_name": "InfoCard"}]}).encode(),
+        "timings": {"total": 1.23456},
+        "upstream": [{"query": "email a@b.co", "max_cards": 1, "turns": 2, "content": "{}", "error": None}],
+    })
+    recorder.close()
+
+    records = list(read_traffic(glob.glob(str(tmp_path / "traffic-*.jsonl.gz"))))
+    assert len(records) == 1
+    record = records[0]
+    assert record["query"] == f"email {REDACTED}"
+    assert record["upstream"][0]["query"] == f"email {REDACTED}"
+    assert record["user_location"] is None
+    assert (record["status"], record["request_class"]) == (200, "background")
+    assert record["screen_content"] == '{"hierarchy": {}}'
+    assert record["timings_ms"] == {"total": 1.235}
+    assert recorder.stats() == {"sampled": 1, "written": 1, "dropped": 0}
@@ -0,0 +1,41 @@
+import pytest
+
+from services.translation_parser import TranslationParser, identify_language
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return TranslationParser()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("translate good morning to French", ("good morning", "English", "French")),
+    ("how do you say thank you in Japanese?", ("thank you", "English", "Japanese")),
+    ("把你好翻译成英文", ("你好", "Chinese", "English")),
+    ("谢谢用日语怎么说", ("谢谢", "Chinese", "Japanese")),
+    ("苹果的英文是什么", ("苹果", "Chinese", "English")),
+])
+def test_translations(parser, query, expected):
+    parameters = parser.parse(query)
+    assert parameters is not None
+    assert (parameters["input_text"], parameters["input_language"], parameters["output_language"]) == expected
+    assert parameters["output_text"] is None
+
+
+@pytest.mark.parametrize("query", [
+    "我的英文",
+    "我的英文不好",
+    "我的英文怎么说",
+    "他的日语是什么",
+    "translate hello to English",
+    "what is the weather in Paris",
+    "我在学英文",
+])
+def test_not_translations(parser, query):
+    assert parser.parse(query) is None
+
+
+def test_identify_language():
+    assert identify_language("こんにちは") == "Japanese"
+    assert identify_language("你好") == "Chinese"
+    assert identify_language("hello") == "English"
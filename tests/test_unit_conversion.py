@@ -0,0 +1,52 @@
+import pytest
+
+from services.unit_conversion import ConversionParser, parse_chinese_number
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return ConversionParser()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("convert 100 usd to eur", ("100", "USD", "EUR")),
+    ("100美元换成欧元", ("100", "USD", "EUR")),
+    ("how many miles is 10 km", ("10", "km", "mi")),
+    ("10 km is how many miles", ("10", "km", "mi")),
+    ("三百五十公斤等于多少磅", ("350", "kg", "lb")),
+    ("100 fahrenheit to celsius", ("100", "F", "C")),
+    ("5公里是多少英里", ("5", "km", "mi")),
+    ("1,500 meters in feet", ("1500", "m", "ft")),
+    ("ten miles to km", ("10", "mi", "km")),
+])
+def test_conversions(parser, query, expected):
+    parameters = parser.parse(query)
+    assert parameters is not None
+    assert (parameters["input_value"], parameters["input_unit"], parameters["output_unit"]) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "小米手机多少寸",
+    "小米手机多少钱",
+    "what is a kilo",
+    "a mile in km",
+    "this is 5 km from here",
+    "米饭是多少克",
+    "一杯咖啡多少钱",
+    "is it cold in celsius",
+    "the best 100 usd gift ideas",
+    "how many meters",
+    "convert 5 km to kg",
+])
+def test_not_conversions(parser, query):
+    assert parser.parse(query) is None
+
+
+@pytest.mark.parametrize("text, value", [
+    ("三百五十", 350),
+    ("十五", 15),
+    ("两千零五", 2005),
+    ("一万二千", 12000),
+])
+def test_parse_chinese_number(text, value):
+    assert parse_chinese_number(text) == value
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Fit screen text ranking weights against labeled examples.
+
+Each line of the labeled JSONL file is an object with:
+    screen_content: the raw screen JSON string (as sent to /initial)
+    relevant:       list of strings; a text item is a positive example when it
+                    contains any of them (case-insensitive)
+
+The fit is an L2-regularised logistic regression over the ranker features plus
+resourceId tokens. The output is a ranking config that can be pointed to with
+SCREEN_RANKING_CONFIG.
+
+Usage:
+    python tools/fit_ranking_weights.py labeled.jsonl -o data/screen_ranking_weights.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config  # noqa: E402
+from services.screen_content_processor import ScreenContentProcessor  # noqa: E402
+from services.screen_ranker import (  # noqa: E402
+    DEFAULT_RANKING_CONFIG, FEATURE_NAMES, ScreenTextRanker, resource_id_tokens
+)
+
+UNLIMITED = 10 ** 6
+
+
+def load_examples(path: str) -> List[Dict[str, Any]]:
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            example = json.loads(line)
+            if not example.get("screen_content") or not example.get("relevant"):
+                print(f"Skipping line {line_number}: needs screen_content and relevant")
+                continue
+            example["relevant"] = [r.lower() for r in example["relevant"]]
+            examples.append(example)
+    return examples
+
+
+def is_relevant(text: str, relevant: List[str]) -> bool:
+    text_lower = text.lower()
+    return any(r in text_lower for r in relevant)
+
+
+def rank_texts(config: Dict[str, Any], screen_content: str) -> List[str]:
+    """
+    Full ranking (no truncation) of the screen texts under a ranking config
+    """
+    processor = ScreenContentProcessor(ScreenTextRanker({**config, "max_items": UNLIMITED}))
+    return [item.text for item in processor.extract_text_content(screen_content)]
+
+
+def texts_needed(config: Dict[str, Any], example: Dict[str, Any]) -> int:
+    """
+    How many top-ranked texts must go into the prompt before a relevant one appears
+    """
+    ranked = rank_texts(config, example["screen_content"])
+    for position, text in enumerate(ranked, 1):
+        if is_relevant(text, example["relevant"]):
+            return position
+    return UNLIMITED
+
+
+def build_dataset(examples: List[Dict[str, Any]], base_config: Dict[str, Any]) -> Tuple[List[List[float]], List[List[str]], List[int]]:
+    ranker = ScreenTextRanker({**base_config, "max_items": UNLIMITED})
+    processor = ScreenContentProcessor(ranker)
+    rows, tokens, labels = [], [], []
+    for example in examples:
+        viewport = processor._get_viewport(json.loads(example["screen_content"]))
+        for item in processor.extract_text_content(example["screen_content"]):
+            rows.append(ranker.feature_vector(item, viewport))
+            tokens.append(resource_id_tokens(item.resource_id))
+            labels.append(1 if is_relevant(item.text, example["relevant"]) else 0)
+    return rows, tokens, labels
+
+
+def fit(rows, tokens, labels, min_token_count: int, epochs: int, learning_rate: float, l2: float):
+    token_counts = Counter(token for item_tokens in tokens for token in set(item_tokens))
+    vocabulary = sorted(token for token, count in token_counts.items() if count >= min_token_count)
+    token_index = {token: len(FEATURE_NAMES) + i for i, token in enumerate(vocabulary)}
+    width = len(FEATURE_NAMES) + len(vocabulary)
+
+    matrix = []
+    for row, item_tokens in zip(rows, tokens):
+        full = row + [0.0] * len(vocabulary)
+        for token in item_tokens:
+            if token in token_index:
+                full[token_index[token]] = 1.0
+        matrix.append(full)
+
+    # Standardise so one learning rate works for every feature
+    n = len(matrix)
+    means = [sum(r[j] for r in matrix) / n for j in range(width)]
+    stds = [math.sqrt(sum((r[j] - means[j]) ** 2 for r in matrix) / n) or 1.0 for j in range(width)]
+    scaled = [[(r[j] - means[j]) / stds[j] for j in range(width)] for r in matrix]
+
+    # Relevant texts are rare, so balance the classes
+    positives = sum(labels)
+    positive_weight = (n - positives) / positives if positives else 1.0
+
+    weights, bias = [0.0] * width, 0.0
+    for _ in range(epochs):
+        gradient, bias_gradient = [0.0] * width, 0.0
+        for r, label in zip(scaled, labels):
+            z = bias + sum(w * x for w, x in zip(weights, r))
+            prediction = 1.0 / (1.0 + math.exp(-max(min(z, 35.0), -35.0)))
+            error = (prediction - label) * (positive_weight if label else 1.0)
+            bias_gradient += error
+            for j in range(width):
+                gradient[j] += error * r[j]
+        bias -= learning_rate * bias_gradient / n
+        for j in range(width):
+            weights[j] -= learning_rate * (gradient[j] / n + l2 * weights[j])
+
+    # Fold the standardisation back into raw-feature weights
+    raw_weights = [w / s for w, s in zip(weights, stds)]
+    raw_bias = bias - sum(w * m for w, m in zip(raw_weights, means))
+    feature_weights = {name: round(raw_weights[i], 6) for i, name in enumerate(FEATURE_NAMES)}
+    token_weights = {token: round(raw_weights[token_index[token]], 6) for token in vocabulary}
+    return raw_bias, feature_weights, token_weights
+
+
+def summarize(label: str, needed: List[int], summary_items: int):
+    found = [k for k in needed if k < UNLIMITED]
+    recall = sum(1 for k in needed if k <= summary_items) / len(needed)
+    mean = sum(found) / len(found) if found else float("nan")
+    worst = max(found) if found else 0
+    print(f"{label:<8} mean texts needed={mean:6.2f}  worst={worst:3d}  recall@{summary_items}={recall:.2%}")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("labeled", help="Labeled examples (JSONL)")
+    parser.add_argument("-o", "--output", required=True, help="Where to write the fitted ranking config")
+    parser.add_argument("--base", default=Config.SCREEN_RANKING_CONFIG, help="Ranking config to compare against")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=0.001)
+    parser.add_argument("--min-token-count", type=int, default=2)
+    parser.add_argument("--tune-summary-items", action="store_true",
+                        help="Set summary_items to the fewest texts that still cover every example")
+    args = parser.parse_args()
+
+    base_config = dict(DEFAULT_RANKING_CONFIG)
+    if args.base and os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as f:
+            base_config.update(json.load(f))
+
+    examples = load_examples(args.labeled)
+    if not examples:
+        raise SystemExit("No usable labeled examples")
+
+    rows, tokens, labels = build_dataset(examples, base_config)
+    if not any(labels):
+        raise SystemExit("No extracted text matches any relevant label")
+    print(f"{len(examples)} examples, {len(rows)} texts, {sum(labels)} relevant")
+
+    bias, feature_weights, token_weights = fit(
+        rows, tokens, labels, args.min_token_count, args.epochs, args.learning_rate, args.l2
+    )
+    fitted_config = {
+        **base_config,
+        "bias": round(bias, 6),
+        "weights": feature_weights,
+        "resource_id_tokens": token_weights,
+    }
+
+    summary_items = int(base_config["summary_items"])
+    summarize("base", [texts_needed(base_config, e) for e in examples], summary_items)
+    worst = summarize("fitted", [texts_needed(fitted_config, e) for e in examples], summary_items)
+    if args.tune_summary_items and worst:
+        fitted_config["summary_items"] = min(worst, int(base_config["max_items"]))
+        print(f"summary_items set to {fitted_config['summary_items']}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(fitted_config, f, ensure_ascii=False, indent=4)
+        f.write("\n")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
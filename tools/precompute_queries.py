@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Precompute analyses for the most frequent screen-independent queries.
+
+Reads a JSONL query log (one object per line with a "query" field), keeps the
+top-K normalized queries that refer neither to the screen nor to a relative
+date ("tomorrow", "明天"), analyzes them with a CardSelector of its own in the
+background request class (background deadline, expired queries skipped) and
+writes a compact file that the server memory-maps when PRECOMPUTED_ANSWERS_PATH
+points at it. The server picks up a rewritten file without a restart.
+
+This process does not share the server's upstream slots, so live traffic is not
+prioritized over it; --concurrency is what bounds its upstream load.
+
+Usage:
+    python tools/precompute_queries.py queries.jsonl -o data/precomputed_answers.tsv --top-k 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.card_selector import CardSelector  # noqa: E402
+from services.precomputed_answers import (  # noqa: E402
+    is_precomputable, normalize_query, write_precomputed_answers
+)
+from services.request_scheduler import BACKGROUND, DeadlineExceeded  # noqa: E402
+
+
+def top_queries(log_path: str, top_k: int, min_count: int):
+    counts = Counter()
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                query = json.loads(line).get("query")
+            except json.JSONDecodeError:
+                continue
+            if isinstance(query, str) and query.strip() and is_precomputable(query):
+                counts[normalize_query(query)] += 1
+    return [(query, count) for query, count in counts.most_common(top_k) if count >= min_count]
+
+
+async def precompute(queries, concurrency: int, max_cards: int):
+    selector = CardSelector()
+    selector.warm_up()
+    semaphore = asyncio.Semaphore(concurrency)
+    answers, failures = {}, 0
+
+    async def run(query):
+        nonlocal failures
+        async with semaphore:
+            try:
+                analysis = await selector.analyze(query, max_cards=max_cards, request_class=BACKGROUND)
+            except DeadlineExceeded:
+                failures += 1
+                return
+        if selector._ranked_candidates(analysis, max_cards) and not analysis.get("fallback"):
+            # Reasoning is only useful for debugging; keep the file compact
+            answers[query] = {key: value for key, value in analysis.items() if key != "reasoning"}
+        else:
+            failures += 1
+
+    await asyncio.gather(*(run(query) for query, _ in queries))
+    return answers, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="Query log (JSONL with a \"query\" field)")
+    parser.add_argument("-o", "--output", required=True, help="Precomputed answers file to write")
+    parser.add_argument("--top-k", type=int, default=500)
+    parser.add_argument("--min-count", type=int, default=2, help="Ignore queries seen fewer times")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum in-flight LLM calls")
+    parser.add_argument("--max-cards", type=int, default=1, help="Ranked cards to precompute per query")
+    args = parser.parse_args()
+
+    queries = top_queries(args.log, args.top_k, args.min_count)
+    if not queries:
+        raise SystemExit("No precomputable queries meet --min-count")
+    covered = sum(count for _, count in queries)
+    print(f"{len(queries)} head queries covering {covered} logged requests")
+
+    start = time.perf_counter()
+    answers, failures = asyncio.run(precompute(queries, args.concurrency, args.max_cards))
+    print(f"Analyzed in {time.perf_counter() - start:.1f}s, {failures} skipped after upstream errors or deadlines")
+
+    # Most frequent first, so the file reads as a ranking
+    write_precomputed_answers(args.output, ((query, answers[query]) for query, _ in queries if query in answers))
+    print(f"Wrote {len(answers)} answers to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
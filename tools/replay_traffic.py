@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Replay captured /initial traffic through CardSelector against the recorded upstream replies.
+
+Capture files come from the server with TRAFFIC_CAPTURE_DIR set. Every recorded
+completion is served by the mock backend, so screen parsing and card generation
+run on real payloads with no network calls and the results are deterministic.
+Only requests that returned 200 are replayed, each in its recorded
+X-Brain-Request-Class lane. Prints recorded versus replayed stage timings and
+the requests whose card types changed; --profile writes cProfile stats for the
+whole replay.
+
+Usage:
+    python tools/replay_traffic.py captures/traffic-*.jsonl.gz [--repeat 3] [--profile replay.prof]
+"""
+import argparse
+import asyncio
+import cProfile
+import os
+import pstats
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.card_selector import CardSelector  # noqa: E402
+from services.llm_backends import MockBackend, completion_key  # noqa: E402
+from services.llm_json import PARSE_OUTCOMES  # noqa: E402
+from services.openai_service import OpenAIService  # noqa: E402
+from services.request_scheduler import INTERACTIVE  # noqa: E402
+from services.traffic_capture import TrafficCapture, capturing, read_traffic  # noqa: E402
+
+
+def build_backend(records):
+    backend = MockBackend()
+    for record in records:
+        for item in record["upstream"]:
+            if item.get("content") is not None:
+                key = completion_key(item["query"], record["screen_content"], item["max_cards"], item["turns"])
+                backend.add(key, item["content"])
+    return backend
+
+
+async def replay(selector, records, repeat):
+    timings = defaultdict(list)
+    changed = []
+    for _ in range(repeat):
+        for record in records:
+            capture = TrafficCapture()
+            start = time.perf_counter()
+            with capturing(capture):
+                cards = await selector.select_card(
+                    record["query"], record["screen_content"],
+                    user_location=record.get("user_location"),
+                    max_cards=record.get("max_cards", 1),
+                    session_id=record.get("session_id"),
+                    request_class=(record.get("request_class") or INTERACTIVE).lower()
+                )
+            capture.timings["total"] = (time.perf_counter() - start) * 1000
+            for name, ms in capture.timings.items():
+                timings[name].append(ms)
+
+            recorded = [card["card_name"] for card in (record.get("response") or {}).get("card_list", [])]
+            replayed = [card.card_name for card in cards]
+            if recorded and recorded != replayed:
+                changed.append((record["query"], recorded, replayed))
+    return timings, changed
+
+
+def median_ms(samples):
+    return f"{statistics.median(samples):9.2f}" if samples else f"{'-':>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="Capture files (traffic-*.jsonl.gz)")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the whole capture this many times")
+    parser.add_argument("--profile", help="Write cProfile stats of the replay to this file")
+    args = parser.parse_args()
+
+    # Failed requests (4xx/5xx) have no card list to compare and their upstream replies may be partial
+    records = [
+        record for record in read_traffic(args.captures)
+        if record.get("query") and record.get("status") == 200
+    ]
+    if not records:
+        raise SystemExit("No successful captured requests found")
+
+    selector = CardSelector()
+    selector.openai_service = OpenAIService(backend=build_backend(records))
+    selector.warm_up()
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    timings, changed = asyncio.run(replay(selector, records, args.repeat))
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    recorded = defaultdict(list)
+    for record in records:
+        for name, ms in record.get("timings_ms", {}).items():
+            recorded[name].append(ms)
+
+    print(f"{len(records)} requests x {args.repeat}; parse outcomes {dict(PARSE_OUTCOMES)}")
+    print(f"{'stage':>18} {'recorded':>9} {'replayed':>9}  (median ms)")
+    for name in sorted(set(recorded) | set(timings)):
+        print(f"{name:>18} {median_ms(recorded[name])} {median_ms(timings[name])}")
+    if changed:
+        print(f"\n{len(changed)} replays returned different cards:")
+        for query, before, after in changed[:20]:
+            print(f"  {query!r}: {before} -> {after}")
+    if profiler:
+        print(f"\nProfile written to {args.profile}")
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(15)
+
+
+if __name__ == "__main__":
+    main()